@@ -0,0 +1,108 @@
+# Batched Bar / Point Labels - one call per bar container instead of one plt.text per bar
+# File: BarLabels.py
+#
+# Labels are drawn with Axes.bar_label on a container holding only the bars that
+# get a label, so thinned bars create no artist at all.  Thinning keeps every
+# n-th bar, where n is chosen so labels cannot overlap at the current axes size,
+# and always keeps the bar with the largest value.  Each figure also has a hard
+# budget of label artists shared by all of its axes.
+
+import numpy as np
+from matplotlib.container import BarContainer
+
+MAX_LABELS_PER_FIGURE = 60
+
+
+def _remaining_budget(fig, max_labels):
+    if max_labels is None:
+        max_labels = MAX_LABELS_PER_FIGURE
+    used = getattr(fig, '_bar_label_count', 0)
+    return max(max_labels - used, 0)
+
+
+def _spend_budget(fig, count):
+    fig._bar_label_count = getattr(fig, '_bar_label_count', 0) + count
+
+
+def _label_capacity(ax, horizontal, labels, fontsize):
+    """How many labels fit along the category axis without overlapping"""
+    extent = ax.get_window_extent()
+    points_to_pixels = ax.figure.dpi / 72
+    if horizontal:
+        lines = max(label.count('\n') + 1 for label in labels)
+        needed = fontsize * 1.3 * lines * points_to_pixels
+        available = extent.height
+    else:
+        widest = max(len(line) for label in labels for line in label.split('\n'))
+        needed = fontsize * 0.65 * max(widest, 1) * points_to_pixels
+        available = extent.width
+    return max(int(available // max(needed, 1)), 1)
+
+
+def label_bars(bars, labels=None, fmt='{:,.0f}', padding=3, max_labels=None, **text_kwargs):
+    """Label the bars of `bars` (a BarContainer) in one batched call
+
+    `labels` defaults to `fmt` applied to each bar's value.  Returns the number
+    of labels drawn.
+    """
+    patches = list(bars.patches)
+    if not patches:
+        return 0
+    ax = patches[0].axes
+    values = np.asarray(bars.datavalues, dtype=float)
+    if labels is None:
+        labels = [fmt.format(value) for value in values]
+    labels = [str(label) for label in labels]
+
+    horizontal = bars.orientation == 'horizontal'
+    fontsize = text_kwargs.get('fontsize', text_kwargs.get('size', 10))
+    capacity = _label_capacity(ax, horizontal, labels, fontsize)
+    budget = _remaining_budget(ax.figure, max_labels)
+    if budget == 0:
+        return 0
+
+    count = len(patches)
+    stride = max(int(np.ceil(count / capacity)), int(np.ceil(count / budget)), 1)
+    anchor = int(np.nanargmax(np.abs(values))) if np.isfinite(values).any() else 0
+    keep = np.arange(anchor % stride, count, stride)[:budget]
+
+    subset = BarContainer([patches[i] for i in keep], datavalues=values[keep], orientation=bars.orientation)
+    ax.bar_label(subset, labels=[labels[i] for i in keep], padding=padding, **text_kwargs)
+    _spend_budget(ax.figure, len(keep))
+    return len(keep)
+
+
+def label_points(ax, x, y, labels, priority=None, max_labels=None, fontsize=9, offset=(5, 5)):
+    """Annotate scatter points, keeping at most one label per label-sized screen cell
+
+    Points with higher `priority` (default: larger y) win their cell.  Returns
+    the number of labels drawn.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) == 0:
+        return 0
+    priority = np.asarray(y if priority is None else priority, dtype=float)
+    labels = [str(label) for label in labels]
+
+    points_to_pixels = ax.figure.dpi / 72
+    widest = max(len(line) for label in labels for line in label.split('\n'))
+    lines = max(label.count('\n') + 1 for label in labels)
+    cell_w = fontsize * 0.65 * widest * points_to_pixels
+    cell_h = fontsize * 1.3 * lines * points_to_pixels
+
+    screen = ax.transData.transform(np.column_stack([x, y]))
+    cells = np.column_stack([np.floor(screen[:, 0] / cell_w), np.floor(screen[:, 1] / cell_h)])
+    order = np.argsort(-priority, kind='stable')
+    _, first = np.unique(cells[order], axis=0, return_index=True)
+    keep = order[np.sort(first)][:_remaining_budget(ax.figure, max_labels)]
+
+    for i in keep:
+        ax.annotate(labels[i], (x[i], y[i]), xytext=offset, textcoords='offset points', fontsize=fontsize)
+    _spend_budget(ax.figure, len(keep))
+    return len(keep)
+
+
+def reset_label_budget(fig):
+    """Give a recycled figure its full label budget back"""
+    fig._bar_label_count = 0
@@ -0,0 +1,301 @@
+# Interactive Dashboard Export - aggregate once in Python, filter/sort in the browser
+# File: DashboardExport.py
+#
+# Instead of re-rendering PNGs for every new filter, the visualizer computes one
+# compact payload, sized by the number of groups rather than the number of rows:
+#   * dims       - dictionary of store / location / product / category names
+#   * stores     - sums per (store, location): aggregate performance and
+#                  conversion views
+#   * products   - sums per (product, location, category): product performance
+#                  and each product's best location
+#   * categories - sums per (category, location)
+#   * supply     - the SUPPLY_ROWS most understocked and most overstocked items,
+#                  the only row-level data shipped
+# Tables are columnar, with dimension values stored as integer codes, and the
+# payload is written into a self-contained HTML page.  The page filters and
+# sums these small tables in JavaScript, so serving a view is a static file
+# read - no pandas or matplotlib work after the first aggregation.  A filter
+# applies to every table that carries its dimension: store to the supply,
+# store and conversion views, product and category to the supply, product and
+# category views, location to all of them.
+
+import html
+import json
+import os
+
+import pandas as pd
+
+DIMENSIONS = {'store': 'Store Name', 'location': 'Store Location',
+              'product': 'Product Name', 'category': 'Product Category'}
+MEASURES = ['Quantity', 'Demand', 'FootFall', 'Estimated_Sales']
+ROLLUPS = {
+    'stores': ['store', 'location'],
+    'products': ['product', 'location', 'category'],
+    'categories': ['category', 'location'],
+}
+SUPPLY_ROWS = 200  # Items shipped from each end of the supply/demand ratio
+
+
+def _columnar(frame, dims, codes, measures):
+    """{dim: codes, measure: values} lists for a frame keyed by DIMENSIONS columns"""
+    table = {short: pd.Categorical(frame[DIMENSIONS[short]].astype(str), categories=dims[short]).codes.tolist()
+             for short in codes}
+    table.update({m: frame[m].round(4).tolist() for m in measures})
+    return table
+
+
+def build_payload(df, sales_column='Estimated_Sales'):
+    """Pre-aggregated, JSON-serializable dashboard data for a visualizer frame
+
+    Sales come from `sales_column` (the visualizer's sales_column option) and
+    are reported as Estimated_Sales, like the MetricsCore aggregates.
+    """
+    frame = df[list(DIMENSIONS.values()) + MEASURES[:-1]].assign(Estimated_Sales=df[sales_column])
+    dims = {short: sorted(frame[column].astype(str).unique()) for short, column in DIMENSIONS.items()}
+
+    rollups = {}
+    for name, grain in ROLLUPS.items():
+        keys = [DIMENSIONS[short] for short in grain]
+        grouped = frame.groupby(keys, dropna=False)
+        sums = grouped[MEASURES].sum()
+        sums['Rows'] = grouped.size()
+        rollups[name] = _columnar(sums.reset_index(), dims, grain, MEASURES + ['Rows'])
+
+    ratio = frame['Quantity'] / frame['Demand']  # Demand > 0 once validated
+    order = ratio.sort_values(kind='stable').index
+    picked = order[:SUPPLY_ROWS].union(order[-SUPPLY_ROWS:], sort=False)
+    supply = frame.loc[picked]
+
+    return {
+        'dims': dims,
+        **rollups,
+        'supply': _columnar(supply, dims, list(DIMENSIONS), ['Quantity', 'Demand']),
+        'supply_rows': SUPPLY_ROWS,
+        'thresholds': {'understock': 0.8, 'overstock': 1.5},
+    }
+
+
+def export_dashboard(viz, output_dir, title='Marketplace Dashboard'):
+    """Write dashboard.html (data embedded) and dashboard_data.json; returns the HTML path"""
+    os.makedirs(output_dir, exist_ok=True)
+    payload = build_payload(viz.df, viz.sales_column)
+    data = json.dumps(payload, separators=(',', ':'))
+    with open(os.path.join(output_dir, 'dashboard_data.json'), 'w', encoding='utf-8') as fh:
+        fh.write(data)
+    html_path = os.path.join(output_dir, 'dashboard.html')
+    with open(html_path, 'w', encoding='utf-8') as fh:
+        fh.write(HTML_TEMPLATE.replace('__TITLE__', html.escape(title)).replace('__DATA__', data.replace('</', '<\\/')))
+    print(f"✅ Dashboard written to {html_path} ({len(data) / 1024:.1f} KiB of data)")
+    return html_path
+
+
+def serve(directory, port=8000):
+    """Serve the exported files as static content"""
+    import functools
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=directory)
+    print(f"🌐 Serving {directory} on http://localhost:{port}/dashboard.html")
+    ThreadingHTTPServer(('', port), handler).serve_forever()
+
+
+HTML_TEMPLATE = r"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<style>
+  body { font-family: -apple-system, Segoe UI, Helvetica, Arial, sans-serif; margin: 24px; color: #222; }
+  h1 { margin-bottom: 4px; }
+  .filters { display: flex; gap: 16px; margin: 16px 0 24px; flex-wrap: wrap; }
+  .filters label { font-weight: bold; font-size: 13px; }
+  .filters select { display: block; min-width: 180px; }
+  section { margin-bottom: 36px; }
+  table { border-collapse: collapse; width: 100%; font-size: 13px; }
+  th, td { padding: 4px 8px; border-bottom: 1px solid #eee; text-align: left; }
+  th { cursor: pointer; background: #f6f6f6; user-select: none; }
+  td.num { text-align: right; font-variant-numeric: tabular-nums; }
+  .bar { height: 12px; border-radius: 2px; }
+  .under { background: #e74c3c; } .balanced { background: #2ecc71; } .over { background: #3498db; }
+  .neutral { background: #f39c12; }
+  .muted { color: #777; font-size: 12px; }
+</style>
+</head>
+<body>
+<h1>__TITLE__</h1>
+<div class="muted">Filtering and sorting run in your browser on pre-aggregated data.
+  Store filters the supply, store and conversion views; product and category filter the supply, product and
+  category views.</div>
+<div class="filters" id="filters"></div>
+<section><h2>1. Supply vs Demand</h2><div class="muted" id="supply-note"></div><div id="supply"></div></section>
+<section><h2>2. Aggregate Performance by Store</h2><div id="aggregate"></div></section>
+<section><h2>3. Product Performance</h2><div id="product"></div><h3>By Category</h3><div id="category"></div></section>
+<section><h2>4. FootFall Conversion by Store</h2><div id="conversion"></div></section>
+<script>
+const DATA = __DATA__;
+const DIMS = ['store', 'location', 'category', 'product'];
+const LABELS = {store: 'Store Name', location: 'Store Location', product: 'Product Name', category: 'Product Category'};
+const MEASURES = ['Quantity', 'Demand', 'FootFall', 'Estimated_Sales', 'Rows'];
+const filters = {};
+const sortState = {};
+const MAX_ROWS = 200;  // Rows drawn per table; sorting and filtering still use every row
+
+function selectedRows(t) {
+  const dims = DIMS.filter(d => t[d] !== undefined && filters[d] !== undefined), rows = [];
+  const n = t[Object.keys(t)[0]].length;
+  for (let i = 0; i < n; i++) {
+    if (dims.every(d => t[d][i] === filters[d])) rows.push(i);
+  }
+  return rows;
+}
+
+function rollup(t, rows, keyFn) {
+  const groups = new Map();
+  for (const i of rows) {
+    const key = keyFn(i);
+    let g = groups.get(key);
+    if (!g) { g = {key: key}; MEASURES.forEach(m => g[m] = 0); groups.set(key, g); }
+    MEASURES.forEach(m => { if (t[m] !== undefined) g[m] += t[m][i]; });
+  }
+  return [...groups.values()];
+}
+
+function esc(s) {
+  return String(s).replace(/[&<>"']/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c]));
+}
+
+function band(ratio) {
+  if (ratio < DATA.thresholds.understock) return 'under';
+  if (ratio > DATA.thresholds.overstock) return 'over';
+  return 'balanced';
+}
+
+function fmt(v, digits) {
+  if (v === null || v === undefined || !isFinite(v)) return '–';
+  return Number(v).toLocaleString(undefined, {maximumFractionDigits: digits, minimumFractionDigits: digits});
+}
+
+function table(id, columns, rows, barColumn, barClass) {
+  const state = sortState[id] || {col: barColumn, desc: true};
+  sortState[id] = state;
+  rows.sort((a, b) => {
+    const x = a[state.col], y = b[state.col];
+    const cmp = (typeof x === 'string') ? x.localeCompare(y) : ((x ?? -Infinity) - (y ?? -Infinity));
+    return state.desc ? -cmp : cmp;
+  });
+  const max = rows.reduce((m, r) => isFinite(r[barColumn]) ? Math.max(m, Math.abs(r[barColumn])) : m, 1e-9);
+  const shown = rows.slice(0, MAX_ROWS);
+  let html = rows.length > MAX_ROWS ? `<div class="muted">Showing ${MAX_ROWS} of ${rows.length} rows</div>` : '';
+  html += '<table><thead><tr>';
+  columns.forEach(c => html += `<th data-col="${c.key}">${c.label}${state.col === c.key ? (state.desc ? ' ▼' : ' ▲') : ''}</th>`);
+  html += '<th></th></tr></thead><tbody>';
+  shown.forEach(r => {
+    html += '<tr>';
+    columns.forEach(c => html += c.digits === undefined ? `<td>${esc(r[c.key])}</td>` : `<td class="num">${fmt(r[c.key], c.digits)}</td>`);
+    const width = isFinite(r[barColumn]) ? 100 * Math.abs(r[barColumn]) / max : 0;
+    html += `<td style="width:30%"><div class="bar ${barClass(r)}" style="width:${width}%"></div></td></tr>`;
+  });
+  html += '</tbody></table>';
+  const el = document.getElementById(id);
+  el.innerHTML = html;
+  el.querySelectorAll('th[data-col]').forEach(th => th.onclick = () => {
+    const col = th.dataset.col;
+    sortState[id] = {col: col, desc: state.col === col ? !state.desc : true};
+    render();
+  });
+}
+
+function render() {
+  const d = DATA.dims;
+
+  const sp = DATA.supply;
+  const items = selectedRows(sp).map(i => ({
+    item: `${d.product[sp.product[i]]} @ ${d.store[sp.store[i]]} (${d.location[sp.location[i]]})`,
+    Quantity: sp.Quantity[i], Demand: sp.Demand[i], ratio: sp.Demand[i] > 0 ? sp.Quantity[i] / sp.Demand[i] : Infinity}));
+  table('supply', [{key: 'item', label: 'Item'}, {key: 'Quantity', label: 'Quantity', digits: 0},
+                   {key: 'Demand', label: 'Demand', digits: 0}, {key: 'ratio', label: 'Supply/Demand', digits: 2}],
+        items, 'ratio', r => band(r.ratio));
+
+  const st = DATA.stores, storeRows = selectedRows(st);
+  const storeKey = i => `${d.store[st.store[i]]} (${d.location[st.location[i]]})`;
+  const stores = rollup(st, storeRows, storeKey).map(g => ({
+    store: g.key, Quantity: g.Quantity, Demand: g.Demand, FootFall: g.FootFall / g.Rows,
+    potential: g.Demand * (g.FootFall / g.Rows) / 100}));
+  table('aggregate', [{key: 'store', label: 'Store'}, {key: 'Quantity', label: 'Total Inventory', digits: 0},
+                      {key: 'Demand', label: 'Total Demand', digits: 0}, {key: 'FootFall', label: 'Avg FootFall', digits: 1},
+                      {key: 'potential', label: 'Sales Potential', digits: 1}],
+        stores, 'potential', () => 'neutral');
+
+  const pr = DATA.products, productRows = selectedRows(pr);
+  const products = rollup(pr, productRows, i => d.product[pr.product[i]]).map(g => ({product: g.key, Demand: g.Demand,
+    Quantity: g.Quantity, FootFall: g.FootFall / g.Rows}));
+  const best = new Map();
+  rollup(pr, productRows, i => `${pr.product[i]}|${pr.location[i]}`).forEach(g => {
+    const [p, l] = g.key.split('|');
+    const product = d.product[p];
+    if (!best.has(product) || g.Demand > best.get(product).Demand) best.set(product, {Demand: g.Demand, location: d.location[l]});
+  });
+  products.forEach(p => p.best = best.get(p.product).location);
+  table('product', [{key: 'product', label: 'Product'}, {key: 'Demand', label: 'Total Demand', digits: 0},
+                    {key: 'Quantity', label: 'Total Quantity', digits: 0}, {key: 'FootFall', label: 'Avg FootFall', digits: 1},
+                    {key: 'best', label: 'Best Location'}],
+        products, 'Demand', () => 'neutral');
+
+  const ca = DATA.categories;
+  const categories = rollup(ca, selectedRows(ca), i => d.category[ca.category[i]]).map(g => ({category: g.key,
+    Demand: g.Demand, Quantity: g.Quantity, ratio: g.Demand > 0 ? g.Quantity / g.Demand : Infinity}));
+  table('category', [{key: 'category', label: 'Category'}, {key: 'Demand', label: 'Total Demand', digits: 0},
+                     {key: 'Quantity', label: 'Total Quantity', digits: 0}, {key: 'ratio', label: 'Supply/Demand', digits: 2}],
+        categories, 'Demand', r => band(r.ratio));
+
+  const conversion = rollup(st, storeRows, storeKey).map(g => ({
+    store: g.key, FootFall: g.FootFall, Sales: g.Estimated_Sales,
+    rate: g.FootFall > 0 ? 100 * g.Estimated_Sales / g.FootFall : null}));
+  const rates = conversion.map(c => c.rate).filter(r => r !== null).sort((a, b) => a - b);
+  const median = rates.length ? (rates.length % 2 ? rates[(rates.length - 1) / 2]
+                                 : (rates[rates.length / 2 - 1] + rates[rates.length / 2]) / 2) : 0;
+  table('conversion', [{key: 'store', label: 'Store'}, {key: 'FootFall', label: 'Total FootFall', digits: 0},
+                       {key: 'Sales', label: 'Estimated Sales', digits: 0}, {key: 'rate', label: 'Conversion %', digits: 1}],
+        conversion, 'rate', r => r.rate < median ? 'under' : 'balanced');
+}
+
+function buildFilters() {
+  const box = document.getElementById('filters');
+  DIMS.forEach(dim => {
+    const label = document.createElement('label');
+    label.textContent = LABELS[dim];
+    const select = document.createElement('select');
+    select.innerHTML = '<option value="">All</option>' +
+      DATA.dims[dim].map((n, i) => `<option value="${i}">${esc(n)}</option>`).join('');
+    select.onchange = () => { filters[dim] = select.value === '' ? undefined : Number(select.value); render(); };
+    label.appendChild(select);
+    box.appendChild(label);
+  });
+}
+
+document.getElementById('supply-note').textContent =
+  `The ${DATA.supply_rows} most understocked and ${DATA.supply_rows} most overstocked items`;
+buildFilters();
+render();
+</script>
+</body>
+</html>
+"""
+
+
+if __name__ == "__main__":
+    import argparse
+    import matplotlib
+    matplotlib.use('Agg')
+    from DaaVis2 import MarketplaceVisualizer
+
+    parser = argparse.ArgumentParser(description="Export the marketplace dashboard as interactive HTML")
+    parser.add_argument('csv_file_path')
+    parser.add_argument('--output-dir', default='dashboard')
+    parser.add_argument('--serve', action='store_true', help="Serve the exported files afterwards")
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    export_dashboard(MarketplaceVisualizer(args.csv_file_path), args.output_dir)
+    if args.serve:
+        serve(args.output_dir, args.port)
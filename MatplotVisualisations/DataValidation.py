@@ -0,0 +1,164 @@
+# Dataset Validation - vectorized checks and quarantine at load time
+# File: DataValidation.py
+#
+# Every check is a column-wide boolean mask; the masks are folded into one
+# bit-coded reason per row, so validating costs a handful of vectorized passes
+# regardless of how many rows fail.  Rows with any reason are moved to a
+# quarantine side file (with a Reject_Reasons column) and never reach the
+# Supply_Demand_Ratio division, so Demand == 0 can no longer produce inf.
+
+import numpy as np
+import pandas as pd
+
+KEY_COLUMNS = ['Store Name', 'Store Location', 'Product Name']
+NUMERIC_COLUMNS = ['Quantity', 'Demand', 'FootFall']
+REQUIRED_COLUMNS = KEY_COLUMNS + ['Product Category'] + NUMERIC_COLUMNS
+
+# Reason code bit -> reason name
+REASONS = {
+    1: 'missing_key',
+    2: 'missing_value',
+    4: 'bad_type',
+    8: 'non_positive_demand',
+    16: 'negative_quantity',
+    32: 'negative_footfall',
+    64: 'duplicate_key',
+}
+
+
+def _reason_text(code):
+    return '|'.join(name for bit, name in REASONS.items() if code & bit)
+
+
+def _duplicate_rows(key_codes, valid):
+    """Rows among `valid` whose key repeats an earlier valid row, from the factorized key columns
+
+    The per-column codes are packed into one int64 per row (exact, no hash
+    collisions).  When the packed keys are dense, a byte-per-key scatter tells
+    whether any key repeats at all (the clean case stops there), then a
+    bincount finds the repeated keys and only their rows are ordered; sparse
+    keys fall back to a hash table over the packed ints.
+    """
+    span = 1
+    for codes, cardinality in key_codes:
+        span *= cardinality + 1
+    if span >= 2 ** 62:
+        return None  # Too many distinct labels to pack; caller falls back to df.duplicated
+    packed = np.zeros(len(valid), dtype=np.int64)
+    for codes, cardinality in key_codes:  # In place: three full-length temporaries per column add up
+        packed *= cardinality + 1
+        packed += codes
+        packed += 1  # Missing (-1) packs as its own value
+    duplicated = np.zeros(len(valid), dtype=bool)
+    if span > 8 * len(valid):
+        candidates = np.flatnonzero(valid)
+    else:
+        packed[~valid] = span  # Invalid rows share a slot of their own that is never reported
+        seen = np.zeros(span + 1, dtype=np.uint8)
+        seen[packed] = 1
+        seen[span] = 0
+        if int(seen.sum()) == np.count_nonzero(valid):
+            return duplicated
+        counts = np.bincount(packed, minlength=span + 1)
+        counts[span] = 0
+        candidates = np.flatnonzero(counts[packed] > 1)
+    duplicated[candidates] = pd.Series(packed[candidates]).duplicated(keep='first').to_numpy()
+    return duplicated
+
+
+def validate_frame(df, quarantine_path=None, check_duplicates=True):
+    """Split `df` into (clean frame, report); bad rows go to `quarantine_path` if given (header only when none)
+
+    The key columns are factorized once and the codes serve both the
+    missing-key and the duplicate-key check; pass check_duplicates=False when
+    the source already guarantees unique keys.  The caller's frame is never
+    modified.  Raises ValueError when a required column is missing altogether.
+    """
+    columns = df.columns.str.strip()
+    if not columns.equals(df.columns):
+        df = df.set_axis(columns, axis=1)
+    missing_columns = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Dataset is missing required columns: {missing_columns}")
+
+    codes = np.zeros(len(df), dtype=np.uint8)
+
+    key_codes = []
+    for column in KEY_COLUMNS:
+        if check_duplicates:  # The codes also answer the missing-key check
+            values = df[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):  # Already factorized (MarketplaceData.from_csv)
+                column_codes, labels = values.cat.codes.to_numpy(), values.cat.categories
+            else:
+                column_codes, labels = pd.factorize(values)
+            missing = column_codes == -1
+            if '' in labels:
+                missing |= column_codes == labels.get_loc('')
+            key_codes.append((column_codes, len(labels)))
+        else:
+            missing = (df[column].isna() | df[column].eq('')).to_numpy()
+        codes |= missing * np.uint8(1)
+
+    numeric, coerced = {}, {}
+    for column in NUMERIC_COLUMNS:
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values):
+            numeric[column] = values
+        else:
+            numeric[column] = coerced[column] = pd.to_numeric(values, errors='coerce')
+            codes |= (numeric[column].isna() & values.notna()).to_numpy() * np.uint8(4)
+        codes |= values.isna().to_numpy() * np.uint8(2)
+
+    codes |= (numeric['Demand'] <= 0).to_numpy() * np.uint8(8)
+    codes |= (numeric['Quantity'] < 0).to_numpy() * np.uint8(16)
+    codes |= (numeric['FootFall'] < 0).to_numpy() * np.uint8(32)
+    if check_duplicates:  # Only among otherwise valid rows, so a bad first copy can't take a good one with it
+        valid = codes == 0
+        duplicated = _duplicate_rows(key_codes, valid)
+        if duplicated is None:
+            duplicated = np.zeros(len(df), dtype=bool)
+            duplicated[valid] = df.loc[valid].duplicated(KEY_COLUMNS, keep='first').to_numpy()
+        codes |= duplicated * np.uint8(64)
+
+    bad = codes != 0
+    any_bad = bool(bad.any())
+    clean = df.assign(**coerced) if coerced else df  # Quarantined rows keep their raw values
+    if any_bad:
+        clean = clean.loc[~bad]
+
+    counts = {name: int(np.count_nonzero(codes & bit)) for bit, name in REASONS.items()}
+    report = {
+        'rows_in': int(len(df)),
+        'rows_clean': int(len(clean)),
+        'rows_quarantined': int(np.count_nonzero(bad)),
+        'reasons': {name: count for name, count in counts.items() if count},
+        'quarantine_path': None,
+    }
+
+    if any_bad:
+        quarantined = df.loc[bad].copy()
+        # Few distinct codes exist, so format each once and map
+        unique_codes, inverse = np.unique(codes[bad], return_inverse=True)
+        quarantined['Reject_Reasons'] = np.array([_reason_text(int(c)) for c in unique_codes])[inverse]
+        if quarantine_path:
+            quarantined.to_csv(quarantine_path, index=False)
+            report['quarantine_path'] = quarantine_path
+        report['quarantined'] = quarantined
+    elif quarantine_path:  # Header only, so a clean run does not leave a previous run's rejects behind
+        df.iloc[:0].assign(Reject_Reasons=pd.Series(dtype=object)).to_csv(quarantine_path, index=False)
+        report['quarantine_path'] = quarantine_path
+
+    return (clean.reset_index(drop=True) if any_bad else clean), report
+
+
+def default_quarantine_path(csv_file_path):
+    stem = csv_file_path[:-4] if csv_file_path.lower().endswith('.csv') else csv_file_path
+    return f"{stem}.quarantine.csv"
+
+
+def print_report(report):
+    if report['rows_quarantined'] == 0:
+        return
+    reasons = ', '.join(f"{name}={count}" for name, count in report['reasons'].items())
+    target = f" -> {report['quarantine_path']}" if report['quarantine_path'] else ''
+    print(f"⚠️ Quarantined {report['rows_quarantined']} of {report['rows_in']} rows ({reasons}){target}")
@@ -1,8 +1,10 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 from matplotlib.patches import Rectangle
+from BarLabels import label_bars
+from FigureManager import new_figure, new_subplots
+from VisualizerBase import BaseVisualizer
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -10,25 +12,21 @@ warnings.filterwarnings('ignore')
 plt.style.use('default')
 sns.set_palette("husl")
 
-class MarketplaceVisualizer:
-    def __init__(self, csv_file_path):
-        """Initialize with CSV data"""
-        self.df = pd.read_csv(r"C:\University\lloyds\lloyds-hackathon-project\MatplotVisualisations\product_data(in).csv")
-        self.df.columns = self.df.columns.str.strip()  # Clean column names
-        
+class MarketplaceVisualizer(BaseVisualizer):
+    """Visualizations 1-5; each draws a MetricsCore aggregate and returns its insights"""
+    
     def visualization_1_supply_demand_gap(self, save_path=None):
         """
         1. SUPPLY VS DEMAND GAP ANALYSIS
         Most Critical: Shows over/under-stocked items for inventory optimization
         """
-        plt.figure(figsize=(12, 8))
-        
-        # Create supply-demand ratio
-        self.df['Supply_Demand_Ratio'] = self.df['Quantity'] / self.df['Demand']
+        # Supply_Demand_Ratio is derived once at load by MetricsCore
+        rows = self.graph_table('v1')
+        new_figure(figsize=(12, 8))
         
         # Color coding: Red = understocked, Green = well-stocked, Blue = overstocked
         colors = []
-        for ratio in self.df['Supply_Demand_Ratio']:
+        for ratio in rows['Supply_Demand_Ratio']:
             if ratio < 0.8:
                 colors.append('red')      # Understocked
             elif ratio > 1.5:
@@ -36,11 +34,11 @@ class MarketplaceVisualizer:
             else:
                 colors.append('green')    # Well-stocked
         
-        scatter = plt.scatter(self.df['Demand'], self.df['Quantity'], 
-                            c=colors, alpha=0.7, s=self.df['FootFall']*2)
+        scatter = plt.scatter(rows['Demand'], rows['Quantity'], 
+                            c=colors, alpha=0.7, s=rows['FootFall']*2)
         
         # Add diagonal line for perfect supply-demand balance
-        max_val = max(self.df['Demand'].max(), self.df['Quantity'].max())
+        max_val = max(rows['Demand'].max(), rows['Quantity'].max())
         plt.plot([0, max_val], [0, max_val], 'k--', alpha=0.5, label='Perfect Balance')
         
         plt.xlabel('Demand', fontsize=12)
@@ -61,27 +59,20 @@ class MarketplaceVisualizer:
         plt.grid(True, alpha=0.3)
         plt.tight_layout()
         
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.show()
+        self._finish_figure(save_path)
         
-        return self._get_insights_supply_demand()
+        return self.insights('supply_demand')
     
     def visualization_2_store_performance(self, save_path=None):
         """
         2. STORE PERFORMANCE COMPARISON
         Essential: Compare stores across all key metrics
         """
-        fig, axes = plt.subplots(2, 2, figsize=(15, 10))
+        fig, axes = new_subplots(2, 2, figsize=(15, 10))
         fig.suptitle('Store Performance Dashboard', fontsize=16, y=0.98)
         
         # Group by store
-        store_metrics = self.df.groupby('Store Name').agg({
-            'Quantity': 'sum',
-            'Demand': 'sum', 
-            'FootFall': 'mean'
-        }).reset_index()
-        store_metrics['Sales_Potential'] = store_metrics['Demand'] * store_metrics['FootFall'] / 100
+        store_metrics = self.graph_table('v2')
         
         # 1. Total Inventory by Store
         bars1 = axes[0,0].bar(store_metrics['Store Name'], store_metrics['Quantity'], 
@@ -91,10 +82,7 @@ class MarketplaceVisualizer:
         axes[0,0].tick_params(axis='x', rotation=45)
         
         # Add value labels on bars
-        for bar in bars1:
-            height = bar.get_height()
-            axes[0,0].text(bar.get_x() + bar.get_width()/2., height,
-                          f'{int(height)}', ha='center', va='bottom')
+        label_bars(bars1, [f'{int(height)}' for height in bars1.datavalues], padding=0)
         
         # 2. Total Demand by Store
         bars2 = axes[0,1].bar(store_metrics['Store Name'], store_metrics['Demand'], 
@@ -103,10 +91,7 @@ class MarketplaceVisualizer:
         axes[0,1].set_ylabel('Total Demand')
         axes[0,1].tick_params(axis='x', rotation=45)
         
-        for bar in bars2:
-            height = bar.get_height()
-            axes[0,1].text(bar.get_x() + bar.get_width()/2., height,
-                          f'{int(height)}', ha='center', va='bottom')
+        label_bars(bars2, [f'{int(height)}' for height in bars2.datavalues], padding=0)
         
         # 3. Average FootFall by Store
         bars3 = axes[1,0].bar(store_metrics['Store Name'], store_metrics['FootFall'], 
@@ -115,10 +100,7 @@ class MarketplaceVisualizer:
         axes[1,0].set_ylabel('Average FootFall')
         axes[1,0].tick_params(axis='x', rotation=45)
         
-        for bar in bars3:
-            height = bar.get_height()
-            axes[1,0].text(bar.get_x() + bar.get_width()/2., height,
-                          f'{int(height)}', ha='center', va='bottom')
+        label_bars(bars3, [f'{int(height)}' for height in bars3.datavalues], padding=0)
         
         # 4. Sales Potential Score
         bars4 = axes[1,1].bar(store_metrics['Store Name'], store_metrics['Sales_Potential'], 
@@ -127,32 +109,23 @@ class MarketplaceVisualizer:
         axes[1,1].set_ylabel('Potential Score')
         axes[1,1].tick_params(axis='x', rotation=45)
         
-        for bar in bars4:
-            height = bar.get_height()
-            axes[1,1].text(bar.get_x() + bar.get_width()/2., height,
-                          f'{int(height)}', ha='center', va='bottom')
+        label_bars(bars4, [f'{int(height)}' for height in bars4.datavalues], padding=0)
         
         plt.tight_layout()
         
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.show()
+        self._finish_figure(save_path)
         
-        return self._get_insights_store_performance(store_metrics)
+        return self.insights('store_performance')
     
     def visualization_3_category_performance(self, save_path=None):
         """
         3. PRODUCT CATEGORY PERFORMANCE MATRIX
         Strategic: Shows which categories drive the business
         """
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
+        fig, (ax1, ax2) = new_subplots(1, 2, figsize=(16, 6))
         
         # Group by category
-        category_metrics = self.df.groupby('Product Category').agg({
-            'Quantity': 'sum',
-            'Demand': 'sum',
-            'FootFall': 'mean'
-        }).reset_index()
+        category_metrics = self.graph_table('v3')
         
         # 1. Category Performance Bars
         x_pos = np.arange(len(category_metrics))
@@ -187,26 +160,18 @@ class MarketplaceVisualizer:
         
         plt.tight_layout()
         
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.show()
+        self._finish_figure(save_path)
         
-        return self._get_insights_category_performance(category_metrics)
+        return self.insights('category_performance')
     
     def visualization_4_inventory_heatmap(self, save_path=None):
         """
         4. INVENTORY OPTIMIZATION HEATMAP
         Operational: Shows exactly which products need attention by store
         """
-        plt.figure(figsize=(14, 8))
-        
-        # Create pivot table for heatmap
-        pivot_data = self.df.pivot_table(
-            values='Supply_Demand_Ratio', 
-            index='Product Name', 
-            columns='Store Name', 
-            aggfunc='mean'
-        ).fillna(0)
+        # Pivot table for heatmap
+        pivot_data = self.graph_table('v4')
+        new_figure(figsize=(14, 8))
         
         # Create custom colormap: Red (understocked) -> Yellow (balanced) -> Blue (overstocked)
         from matplotlib.colors import LinearSegmentedColormap
@@ -233,25 +198,19 @@ class MarketplaceVisualizer:
         
         plt.tight_layout()
         
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.show()
+        self._finish_figure(save_path)
         
-        return self._get_insights_inventory_heatmap(pivot_data)
+        return self.insights('inventory_heatmap')
     
     def visualization_5_top_products_demand(self, save_path=None):
         """
         5. TOP PRODUCTS BY DEMAND RANKING
         Sales Focus: Identifies best-selling and high-potential products
         """
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
+        fig, (ax1, ax2) = new_subplots(2, 1, figsize=(12, 10))
         
-        # Group by product and sum demand
-        product_demand = self.df.groupby('Product Name').agg({
-            'Demand': 'sum',
-            'FootFall': 'mean',
-            'Quantity': 'sum'
-        }).reset_index().sort_values('Demand', ascending=True)
+        # Demand summed per product
+        product_demand = self.graph_table('v5')
         
         # 1. Top Products by Total Demand
         bars1 = ax1.barh(product_demand['Product Name'], product_demand['Demand'], 
@@ -261,9 +220,7 @@ class MarketplaceVisualizer:
         ax1.grid(axis='x', alpha=0.3)
         
         # Add value labels
-        for i, (bar, value) in enumerate(zip(bars1, product_demand['Demand'])):
-            ax1.text(value + 1, bar.get_y() + bar.get_height()/2, 
-                    f'{int(value)}', va='center', fontweight='bold')
+        label_bars(bars1, [f'{int(value)}' for value in product_demand['Demand']], fontweight='bold')
         
         # 2. Products by FootFall Potential
         product_footfall = product_demand.sort_values('FootFall', ascending=True)
@@ -274,17 +231,13 @@ class MarketplaceVisualizer:
         ax2.grid(axis='x', alpha=0.3)
         
         # Add value labels
-        for i, (bar, value) in enumerate(zip(bars2, product_footfall['FootFall'])):
-            ax2.text(value + 1, bar.get_y() + bar.get_height()/2, 
-                    f'{int(value)}', va='center', fontweight='bold')
+        label_bars(bars2, [f'{int(value)}' for value in product_footfall['FootFall']], fontweight='bold')
         
         plt.tight_layout()
         
-        if save_path:
-            plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.show()
+        self._finish_figure(save_path)
         
-        return self._get_insights_top_products(product_demand)
+        return self.insights('top_products')
     
     def generate_all_visualizations(self, save_directory=None):
         """Generate all 5 visualizations at once"""
@@ -311,67 +264,12 @@ class MarketplaceVisualizer:
             f"{save_directory}/5_top_products.png" if save_directory else None)
         
         return insights
-    
-    # Helper methods for insights
-    def _get_insights_supply_demand(self):
-        understocked = self.df[self.df['Supply_Demand_Ratio'] < 0.8]
-        overstocked = self.df[self.df['Supply_Demand_Ratio'] > 1.5]
-        
-        return {
-            'understocked_items': len(understocked),
-            'overstocked_items': len(overstocked),
-            'critical_understocked': understocked.nsmallest(3, 'Supply_Demand_Ratio')[['Product Name', 'Store Name']].to_dict('records')
-        }
-    
-    def _get_insights_store_performance(self, store_metrics):
-        best_store = store_metrics.loc[store_metrics['Sales_Potential'].idxmax(), 'Store Name']
-        worst_store = store_metrics.loc[store_metrics['Sales_Potential'].idxmin(), 'Store Name']
-        
-        return {
-            'best_performing_store': best_store,
-            'worst_performing_store': worst_store,
-            'store_rankings': store_metrics.sort_values('Sales_Potential', ascending=False)['Store Name'].tolist()
-        }
-    
-    def _get_insights_category_performance(self, category_metrics):
-        top_category = category_metrics.loc[category_metrics['Demand'].idxmax(), 'Product Category']
-        
-        return {
-            'top_category_by_demand': top_category,
-            'category_rankings': category_metrics.sort_values('Demand', ascending=False)['Product Category'].tolist()
-        }
-    
-    def _get_insights_inventory_heatmap(self, pivot_data):
-        critical_cells = []
-        for product in pivot_data.index:
-            for store in pivot_data.columns:
-                ratio = pivot_data.loc[product, store]
-                if ratio < 0.8 and ratio > 0:
-                    critical_cells.append(f"{product} at {store}")
-        
-        return {
-            'critical_inventory_issues': critical_cells[:5]  # Top 5 issues
-        }
-    
-    def _get_insights_top_products(self, product_demand):
-        return {
-            'top_demand_product': product_demand.iloc[-1]['Product Name'],
-            'top_footfall_product': product_demand.loc[product_demand['FootFall'].idxmax(), 'Product Name'],
-            'product_rankings_by_demand': product_demand.sort_values('Demand', ascending=False)['Product Name'].tolist()
-        }
 
 # USAGE EXAMPLE:
+#   viz = MarketplaceVisualizer('product_data(in).csv')
+#   insights = viz.generate_all_visualizations()
 if __name__ == "__main__":
-    # Initialize the visualizer
-    viz = MarketplaceVisualizer('product_datain.csv')
-    
-    # Generate all visualizations and get insights
-    print("=== MARKETPLACE VISUALIZATION SUITE ===\n")
-    insights = viz.generate_all_visualizations()
-    
-    # Print key insights
-    print("\n=== KEY INSIGHTS ===")
-    print(f"Critical understocked items: {insights['supply_demand']['understocked_items']}")
-    print(f"Best performing store: {insights['store_performance']['best_performing_store']}")
-    print(f"Top category by demand: {insights['category_performance']['top_category_by_demand']}")
-    print(f"Top product by demand: {insights['top_products']['top_demand_product']}")
\ No newline at end of file
+    # Renders visualizations 1-5 to files; accepts any VisCLI render option (--data, --output-dir, ...)
+    import sys
+    from VisCLI import main
+    sys.exit(main(['render', '--graphs', 'v*'] + sys.argv[1:]))
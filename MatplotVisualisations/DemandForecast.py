@@ -0,0 +1,110 @@
+# Demand Forecasting - batched Holt smoothing over every (store, product) series
+# File: DemandForecast.py
+#
+# Estimated_Sales = min(Demand, Quantity) only describes the snapshot on disk.
+# This stage reads the SnapshotStore history, lays it out as one
+# (series x snapshot) matrix and fits Holt's linear exponential smoothing to all
+# series at once: the only Python loop is over time steps, every step updates
+# all series and all candidate (alpha, beta) pairs together.  Each series keeps
+# the pair with the lowest one-step-ahead squared error.  Series are processed
+# in chunks so memory stays bounded for millions of series.
+
+import numpy as np
+import pandas as pd
+
+from SnapshotStore import ITEM_KEYS
+
+ALPHAS = (0.1, 0.3, 0.5, 0.7, 0.9)
+BETAS = (0.0, 0.1, 0.3)
+
+
+def history_matrix(history, value='Demand'):
+    """Pivot long snapshots into (keys frame, N x T matrix) with gaps forward-filled"""
+    series = history.groupby(ITEM_KEYS, sort=False).ngroup().to_numpy()
+    key_order = history.groupby(ITEM_KEYS, sort=False).head(1).index
+    keys = history.loc[key_order, ITEM_KEYS].reset_index(drop=True)
+    dates, step = np.unique(history['Snapshot_Date'].to_numpy(), return_inverse=True)
+
+    matrix = np.full((len(keys), len(dates)), np.nan)
+    matrix[series, step] = history[value].to_numpy(dtype=np.float64)
+    matrix = pd.DataFrame(matrix).ffill(axis=1).to_numpy()
+    return keys, matrix, dates
+
+
+def fit_holt(matrix, horizon=1, alphas=ALPHAS, betas=BETAS):
+    """Forecast `horizon` steps ahead for every row of `matrix` (N x T)
+
+    Returns (forecast, alpha, beta) arrays of length N.
+    """
+    grid_alpha, grid_beta = (g.ravel()[:, None] for g in np.meshgrid(alphas, betas, indexing='ij'))
+    n_series, n_steps = matrix.shape
+    first = np.nan_to_num(matrix[np.arange(n_series), np.argmax(~np.isnan(matrix), axis=1)])
+    level = np.broadcast_to(first, (len(grid_alpha), n_series)).copy()
+    trend = np.zeros_like(level)
+    sse = np.zeros_like(level)
+
+    for t in range(1, n_steps):
+        observed = matrix[:, t]
+        predicted = level + trend
+        actual = np.where(np.isnan(observed), predicted, observed)  # Leading gaps: no update, no error
+        sse += (actual - predicted) ** 2
+        new_level = grid_alpha * actual + (1 - grid_alpha) * predicted
+        trend = grid_beta * (new_level - level) + (1 - grid_beta) * trend
+        level = new_level
+
+    best = np.argmin(sse, axis=0)
+    columns = np.arange(n_series)
+    forecast = np.maximum(level[best, columns] + horizon * trend[best, columns], 0)
+    return forecast, grid_alpha.ravel()[best], grid_beta.ravel()[best]
+
+
+def forecast_demand(history, horizon=1, chunk_size=250_000):
+    """Forecast_Demand per (store, location, product) from a SnapshotStore history frame"""
+    keys, matrix, _ = history_matrix(history, 'Demand')
+    forecasts, alphas, betas = [], [], []
+    for start in range(0, len(matrix), chunk_size):
+        forecast, alpha, beta = fit_holt(matrix[start:start + chunk_size], horizon)
+        forecasts.append(forecast)
+        alphas.append(alpha)
+        betas.append(beta)
+    keys['Forecast_Demand'] = np.concatenate(forecasts) if forecasts else np.empty(0)
+    keys['Forecast_Alpha'] = np.concatenate(alphas) if alphas else np.empty(0)
+    keys['Forecast_Beta'] = np.concatenate(betas) if betas else np.empty(0)
+    return keys
+
+
+def apply_forecast(viz, forecast, use_for_conversion=True):
+    """Add Forecast_Demand / Projected_Sales / Projected_Conversion_Rate to a visualizer's frame
+
+    Items without history keep their current Demand.  With `use_for_conversion`
+    the conversion graphs (4A-4D) plot Projected_Sales instead of Estimated_Sales.
+    """
+    df = viz.df.drop(columns=['Forecast_Demand', 'Projected_Sales', 'Projected_Conversion_Rate'],
+                     errors='ignore')
+    df = df.merge(forecast[ITEM_KEYS + ['Forecast_Demand']], on=ITEM_KEYS, how='left')
+    df['Forecast_Demand'] = df['Forecast_Demand'].fillna(df['Demand'])
+    df['Projected_Sales'] = np.minimum(df['Forecast_Demand'], df['Quantity'])
+    df['Projected_Conversion_Rate'] = df['Projected_Sales'] / df['FootFall'] * 100
+    viz.df = df
+    if use_for_conversion:
+        viz.sales_column = 'Projected_Sales'
+    return viz
+
+
+if __name__ == "__main__":
+    import argparse
+    from SnapshotStore import SnapshotStore
+
+    parser = argparse.ArgumentParser(description="Forecast demand for every store/product from snapshot history")
+    parser.add_argument('history_root', help="SnapshotStore directory")
+    parser.add_argument('--start')
+    parser.add_argument('--end')
+    parser.add_argument('--horizon', type=int, default=1)
+    parser.add_argument('--output', default='demand_forecast.csv')
+    args = parser.parse_args()
+
+    snapshots = SnapshotStore(args.history_root).read(args.start, args.end,
+                                                      columns=ITEM_KEYS + ['Demand'])
+    result = forecast_demand(snapshots, args.horizon)
+    result.to_csv(args.output, index=False)
+    print(f"✅ Forecast {len(result)} series over {snapshots['Snapshot_Date'].nunique()} snapshots")
@@ -0,0 +1,107 @@
+# Figure Lifecycle - every graph figure is created here and closed (or recycled) after export
+# File: FigureManager.py
+#
+# Graphs call new_figure / new_subplots instead of plt.figure / plt.subplots,
+# and whoever exports a figure hands it back with release_figure.  By default a
+# released figure is simply closed, so pyplot no longer keeps it (and its
+# 300-dpi Agg canvas) alive.  For long-running headless services:
+#   * pool_size > 0 keeps up to that many cleared figures per (size, dpi) and
+#     hands them out again instead of building a new figure + canvas
+#   * max_rss_mb closes every pooled figure and runs the garbage collector
+#     whenever the process RSS is above the ceiling after a release
+# Pooled figures stay registered with pyplot, so only enable pooling with a
+# non-interactive backend.
+
+import gc
+
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+
+from BarLabels import reset_label_budget
+from Instrumentation import current_rss_mb
+
+SUBPLOT_PARAMS = ['left', 'bottom', 'right', 'top', 'wspace', 'hspace']
+
+
+class FigureManager:
+    def __init__(self, pool_size=0, max_rss_mb=None):
+        self.pool_size = pool_size    # Cleared figures kept per (figsize, dpi); 0 disables pooling
+        self.max_rss_mb = max_rss_mb  # Flush the pool when RSS exceeds this after a release
+        self._pool = {}
+        self.created = self.reused = self.flushes = 0
+
+    @property
+    def pooling(self):
+        return self.pool_size > 0
+
+    @staticmethod
+    def _key(figsize, dpi):
+        figsize = figsize if figsize is not None else mpl.rcParams['figure.figsize']
+        return tuple(float(size) for size in figsize), float(dpi or mpl.rcParams['figure.dpi'])
+
+    def figure(self, figsize=None, dpi=None):
+        """A blank figure made current in pyplot, recycled from the pool when one is free"""
+        free = self._pool.get(self._key(figsize, dpi))
+        if free:
+            fig = free.pop()
+            plt.figure(fig.number)
+            self.reused += 1
+            return fig
+        self.created += 1
+        return plt.figure(figsize=figsize, dpi=dpi)
+
+    def subplots(self, nrows=1, ncols=1, figsize=None, dpi=None, **kwargs):
+        """plt.subplots equivalent backed by figure()"""
+        fig = self.figure(figsize, dpi)
+        return fig, fig.subplots(nrows, ncols, **kwargs)
+
+    def release(self, fig):
+        """Done with `fig`: clear it into the pool or close it, then enforce the RSS ceiling"""
+        if fig is None:
+            return
+        free = self._pool.setdefault(self._key(fig.get_size_inches(), fig.dpi), [])
+        if self.pooling and fig.canvas.manager is not None and len(free) < self.pool_size and fig not in free:
+            fig.clf()
+            fig.subplotpars.update(*(mpl.rcParams[f'figure.subplot.{name}'] for name in SUBPLOT_PARAMS))
+            reset_label_budget(fig)
+            free.append(fig)
+        else:
+            plt.close(fig)
+        if self.max_rss_mb and current_rss_mb() > self.max_rss_mb:
+            self.flush()
+
+    def flush(self):
+        """Close every pooled figure and collect the freed canvases"""
+        for free in self._pool.values():
+            for fig in free:
+                plt.close(fig)
+        self._pool.clear()
+        gc.collect()
+        self.flushes += 1
+
+
+# Process-wide manager used by every graph module
+FIGURES = FigureManager()
+
+
+def configure_figures(pool_size=None, max_rss_mb=None):
+    """Change pooling / the RSS ceiling of the shared manager"""
+    if pool_size is not None:
+        if pool_size < FIGURES.pool_size:
+            FIGURES.flush()
+        FIGURES.pool_size = pool_size
+    if max_rss_mb is not None:
+        FIGURES.max_rss_mb = max_rss_mb or None
+    return FIGURES
+
+
+def new_figure(figsize=None, dpi=None):
+    return FIGURES.figure(figsize, dpi)
+
+
+def new_subplots(nrows=1, ncols=1, figsize=None, dpi=None, **kwargs):
+    return FIGURES.subplots(nrows, ncols, figsize, dpi, **kwargs)
+
+
+def release_figure(fig):
+    FIGURES.release(fig)
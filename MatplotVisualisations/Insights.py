@@ -0,0 +1,268 @@
+# Marketplace Insights - the DataVis insight dicts as a standalone, cached JSON API
+# File: Insights.py
+#
+#   insights(data, 'store_performance')
+#   insights(data, 'supply_demand', store='Craft & Co', limit=5)
+#   data.insights('inventory_heatmap', store='Brew & Bite')   # same thing
+#
+# Every insight reads one small MetricsCore aggregate, never the full frame:
+# supply_demand uses `stock_alerts` (only the rows outside the 0.8-1.5 band,
+# each flagged Understocked / Overstocked), which is built once per dataset
+# version.  Sharded runs ship a summarised stock_alerts instead - the ALERT_ROWS
+# most understocked rows of each store, location and category plus per (store,
+# location, category) count rows with no product.  It answers no filter or any
+# one of store / location / category exactly (critical lists up to ALERT_ROWS);
+# product or combined filters raise ValueError.  Results are plain Python
+# (str / int / float / list / dict) and are memoized in a bounded LRU keyed by
+# (kind, filters, dataset version), so polling the same question costs one
+# dictionary lookup.  Across processes (e.g. a once-a-minute alerting job),
+# InsightStore keeps those small tables on disk keyed by the size and mtime of
+# the source files: while the dataset is unchanged a poll reads only the tables
+# it needs and never re-reads, re-validates or re-quarantines the source.
+# Nothing here imports matplotlib.
+
+import copy
+import json
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from MetricsCore import MarketplaceData, aggregate
+
+# Filter keyword -> column it matches
+FILTER_COLUMNS = {
+    'store': 'Store Name',
+    'location': 'Store Location',
+    'category': 'Product Category',
+    'product': 'Product Name',
+}
+
+Insight = namedtuple('Insight', ['kind', 'table', 'filters', 'compute'])
+INSIGHTS = {}
+
+
+def insight(kind, table, filters=()):
+    """Register `fn(table, **filters)` as insight `kind` over aggregate `table`"""
+    def register(fn):
+        INSIGHTS[kind] = Insight(kind, table, tuple(filters), fn)
+        return fn
+    return register
+
+
+ALERT_ROWS = 10  # Most understocked rows per store, location and category kept by a summarised stock_alerts
+
+
+@aggregate('stock_alerts', needs=['rows'])
+def _stock_alerts(data, rows):
+    ratio = rows['Supply_Demand_Ratio']
+    alerts = rows.loc[(ratio < 0.8) | (ratio > 1.5),
+                      ['Store Name', 'Store Location', 'Product Name', 'Product Category', 'Supply_Demand_Ratio']]
+    return alerts.assign(Understocked=(alerts['Supply_Demand_Ratio'] < 0.8).astype(np.int64),
+                         Overstocked=(alerts['Supply_Demand_Ratio'] > 1.5).astype(np.int64))
+
+
+def _filter_rows(table, filters):
+    for name, value in filters.items():
+        if name in FILTER_COLUMNS:
+            table = table[table[FILTER_COLUMNS[name]] == value]
+    return table
+
+
+# =============================================================================
+# INSIGHT DEFINITIONS
+# =============================================================================
+
+@insight('supply_demand', 'stock_alerts', filters=['store', 'location', 'category', 'product', 'limit'])
+def _supply_demand(alerts, limit=3, **filters):
+    if alerts['Product Name'].isna().any() and ('product' in filters or len(filters) > 1):
+        raise ValueError("supply_demand takes at most one of store / location / category on summarised "
+                         "(sharded) stock alerts")
+    alerts = _filter_rows(alerts, filters)
+    understocked = alerts[alerts['Supply_Demand_Ratio'] < 0.8]
+    return {
+        'understocked_items': int(alerts['Understocked'].sum()),
+        'overstocked_items': int(alerts['Overstocked'].sum()),
+        'critical_understocked': understocked.nsmallest(limit, 'Supply_Demand_Ratio')[
+            ['Product Name', 'Store Name']].to_dict('records')
+    }
+
+
+@insight('store_performance', 'store_metrics', filters=['limit'])
+def _store_performance(store_metrics, limit=None):
+    best_store = store_metrics.loc[store_metrics['Sales_Potential'].idxmax(), 'Store Name']
+    worst_store = store_metrics.loc[store_metrics['Sales_Potential'].idxmin(), 'Store Name']
+    return {
+        'best_performing_store': str(best_store),
+        'worst_performing_store': str(worst_store),
+        'store_rankings': store_metrics.sort_values('Sales_Potential', ascending=False)['Store Name'].tolist()[:limit]
+    }
+
+
+@insight('category_performance', 'category_metrics', filters=['limit'])
+def _category_performance(category_metrics, limit=None):
+    top_category = category_metrics.loc[category_metrics['Demand'].idxmax(), 'Product Category']
+    return {
+        'top_category_by_demand': str(top_category),
+        'category_rankings': category_metrics.sort_values('Demand', ascending=False)[
+            'Product Category'].tolist()[:limit]
+    }
+
+
+@insight('inventory_heatmap', 'ratio_heatmap', filters=['store', 'product', 'limit'])
+def _inventory_heatmap(pivot_data, limit=5, store=None, product=None):
+    if store is not None:
+        pivot_data = pivot_data.loc[:, pivot_data.columns == store]
+    if product is not None:
+        pivot_data = pivot_data.loc[pivot_data.index == product]
+    cells = pivot_data.stack()  # Product-major, same order as scanning the heatmap row by row
+    critical = cells[(cells < 0.8) & (cells > 0)].index[:limit]
+    return {
+        'critical_inventory_issues': [f"{product_name} at {store_name}" for product_name, store_name in critical]
+    }
+
+
+@insight('top_products', 'product_metrics', filters=['limit'])
+def _top_products(product_demand, limit=None):
+    return {
+        'top_demand_product': str(product_demand.iloc[-1]['Product Name']),
+        'top_footfall_product': str(product_demand.loc[product_demand['FootFall'].idxmax(), 'Product Name']),
+        'product_rankings_by_demand': product_demand.sort_values('Demand', ascending=False)[
+            'Product Name'].tolist()[:limit]
+    }
+
+
+# =============================================================================
+# CACHED API
+# =============================================================================
+
+class InsightCache:
+    """Thread-safe bounded LRU of insight results"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
+
+
+CACHE = InsightCache()
+
+
+def insights(data, kind, **filters):
+    """Insight `kind` for MarketplaceData `data`, narrowed by `filters`; see INSIGHTS for kinds
+
+    Raises ValueError for an unknown kind or a filter the kind does not take.
+    """
+    if kind not in INSIGHTS:
+        raise ValueError(f"Unknown insight '{kind}'; known: {', '.join(INSIGHTS)}")
+    spec = INSIGHTS[kind]
+    unknown = sorted(set(filters) - set(spec.filters))
+    if unknown:
+        raise ValueError(f"Insight '{kind}' does not take {unknown}; allowed: {list(spec.filters)}")
+    filters = {name: value for name, value in filters.items() if value is not None}
+
+    key = (kind, tuple(sorted(filters.items())), data.version)
+    result = CACHE.get(key)
+    if result is None:
+        result = spec.compute(data.aggregate(spec.table), **filters)
+        CACHE.put(key, result)
+    return copy.deepcopy(result)  # Callers may mutate their copy freely
+
+
+# =============================================================================
+# PERSISTED TABLES
+# =============================================================================
+
+def source_fingerprint(paths):
+    """[path, size, mtime_ns] of every source file; changes whenever one is rewritten"""
+    fingerprint = []
+    for path in paths:
+        stat = os.stat(path)
+        fingerprint.append([os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+    return fingerprint
+
+
+class InsightStore:
+    """On-disk copy of the insight tables, valid while the source fingerprint is unchanged
+
+    Layout of `directory`:
+        key.json            source fingerprint, load options and table FORMAT the tables were built from
+        <table>.pkl         one pickle per table an insight reads (no optional engine needed)
+    """
+
+    KEY_FILE = 'key.json'
+    FORMAT = 3  # Bumped whenever a table's layout changes, so older stores read as stale
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _key_path(self):
+        return os.path.join(self.directory, self.KEY_FILE)
+
+    def _table_path(self, name):
+        return os.path.join(self.directory, f"{name}.pkl")
+
+    def load(self, key, kinds=None):
+        """Frame-less MarketplaceData with the tables `kinds` read (default: all), or None when stale"""
+        try:
+            with open(self._key_path(), encoding='utf-8') as fh:
+                if json.load(fh) != key:
+                    return None
+        except (FileNotFoundError, ValueError):
+            return None
+        names = dict.fromkeys(INSIGHTS[kind].table for kind in (kinds or INSIGHTS) if kind in INSIGHTS)
+        return MarketplaceData.from_aggregates({name: pd.read_pickle(self._table_path(name)) for name in names})
+
+    def save(self, key, data):
+        """Persist every insight table of `data`; the key is written last, so readers never see a partial set"""
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self._key_path()):
+            os.remove(self._key_path())
+        for name in dict.fromkeys(spec.table for spec in INSIGHTS.values()):
+            data.aggregate(name).to_pickle(self._table_path(name))
+        tmp_path = self._key_path() + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump(key, fh)
+        os.replace(tmp_path, self._key_path())
+
+
+def polled_data(sources, load, directory, options=None, kinds=None):
+    """MarketplaceData for answering insights about the files `sources`
+
+    Served from the InsightStore in `directory` while the files are unchanged;
+    otherwise `load()` builds it from scratch and the store is refreshed.
+    `options` (JSON-ready) are part of the key, e.g. check_duplicates.
+    """
+    key = {'sources': source_fingerprint(sources), 'options': options or {}, 'format': InsightStore.FORMAT}
+    store = InsightStore(directory)
+    data = store.load(key, kinds)
+    if data is None:
+        data = load()
+        store.save(key, data)
+    return data
@@ -0,0 +1,98 @@
+# Run Instrumentation - per-stage wall-clock timings for loads, aggregates and renders
+# File: Instrumentation.py
+#
+# A Profiler collects one record per timed stage ('load', 'aggregate:<name>',
+# 'graph:<id>', ...).  Pass it to MarketplaceData / render_graphs to time the
+# core; leave it as None and nothing is measured.  With track_memory, each
+# stage also reports its peak resident set size, sampled by a background
+# thread (reading /proc/self/statm on Linux) while the stage runs.
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+_PAGE_MB = os.sysconf('SC_PAGE_SIZE') / 2 ** 20 if hasattr(os, 'sysconf') else 0
+
+
+def current_rss_mb():
+    """Resident set size of this process in MiB (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as handle:
+            return int(handle.read().split()[1]) * _PAGE_MB
+    except OSError:
+        try:
+            import resource
+        except ImportError:  # Windows
+            return 0.0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10)
+
+
+class RssSampler:
+    """Context manager tracking the peak RSS reached while its block runs"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.start_mb = self.peak_mb = 0.0
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = current_rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+        return False
+
+
+class Profiler:
+    def __init__(self, track_memory=False):
+        self.records = []
+        self.track_memory = track_memory
+
+    @contextmanager
+    def stage(self, name, **fields):
+        """Time the enclosed block as stage `name` (and its peak RSS with track_memory)"""
+        sampler = RssSampler() if self.track_memory else None
+        start = time.perf_counter()
+        try:
+            if sampler is None:
+                yield
+            else:
+                with sampler:
+                    yield
+        finally:
+            if sampler is not None:
+                fields['peak_rss_mb'] = round(sampler.peak_mb, 1)
+            self.record(name, time.perf_counter() - start, **fields)
+
+    def record(self, name, seconds, **fields):
+        self.records.append({'stage': name, 'seconds': round(seconds, 4), **fields})
+
+    def total(self):
+        return sum(record['seconds'] for record in self.records)
+
+    def report(self):
+        """Print stages slowest first"""
+        if not self.records:
+            return
+        width = max(len(record['stage']) for record in self.records)
+        print(f"⏱️ Profile ({len(self.records)} stages, {self.total():.3f}s total)")
+        for record in sorted(self.records, key=lambda r: r['seconds'], reverse=True):
+            extra = ', '.join(f"{key}={value}" for key, value in record.items() if key not in ('stage', 'seconds'))
+            print(f"  {record['stage']:<{width}}  {record['seconds']:>8.3f}s  {extra}".rstrip())
+
+    def to_json(self, path):
+        with open(path, 'w') as handle:
+            json.dump({'total_seconds': round(self.total(), 4), 'stages': self.records}, handle, indent=2)
@@ -0,0 +1,512 @@
+# Marketplace Metrics Core - one data model and one graph registry for every visualizer
+# File: MetricsCore.py
+#
+# DataVis.py and DaaVis2.py used to load, clean and aggregate the CSV on their
+# own (DataVis only derived Supply_Demand_Ratio inside visualization_1).  Both
+# now draw from MarketplaceData:
+#   * the frame is loaded, validated and its derived columns added exactly once
+#   * aggregates are registered with the tables they depend on, computed lazily
+#     in dependency order and memoized, so any subset of graphs can run in any
+#     order without recomputing anything
+#   * GRAPHS is a registry of GraphSpec entries naming the aggregates each graph
+#     needs; render_graphs() computes the union of those aggregates once and then
+#     plots in parallel worker processes that receive only the tables they need
+# Nothing here imports matplotlib - plotting modules are imported by name only
+# when a graph is actually drawn.
+
+import fnmatch
+import importlib
+import itertools
+import os
+import time
+from collections import namedtuple
+from contextlib import nullcontext
+
+import numpy as np
+import pandas as pd
+
+from DataValidation import KEY_COLUMNS, default_quarantine_path, print_report, validate_frame
+from Sketches import distinct_count
+
+# Dataset shipped next to the modules; used whenever no path is given
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'product_data(in).csv')
+
+_VERSIONS = itertools.count(1)
+
+# Parsed as categories by from_csv: cheaper to read, and validation reuses the
+# codes for the key checks; from_frame turns them back into strings
+LABEL_COLUMNS = KEY_COLUMNS + ['Product Category']
+
+# =============================================================================
+# AGGREGATE REGISTRY
+# =============================================================================
+
+Aggregate = namedtuple('Aggregate', ['name', 'needs', 'compute'])
+AGGREGATES = {}
+
+
+def aggregate(name, needs=()):
+    """Register `fn(data, *needed_tables)` as aggregate `name`"""
+    def register(fn):
+        AGGREGATES[name] = Aggregate(name, tuple(needs), fn)
+        return fn
+    return register
+
+
+def aggregate_order(names):
+    """`names` plus everything they depend on, dependencies first"""
+    ordered, seen = [], set()
+
+    def visit(name):
+        if name in seen:
+            return
+        seen.add(name)
+        for dependency in AGGREGATES[name].needs:
+            visit(dependency)
+        ordered.append(name)
+
+    for name in names:
+        visit(name)
+    return ordered
+
+
+# =============================================================================
+# DATA MODEL
+# =============================================================================
+
+def _label_strings(df):
+    """{column: string Series} for the categorical label columns of `df` (aggregates slice and join labels)"""
+    restored = {}
+    for column in LABEL_COLUMNS:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            labels = values.cat.categories.astype(str).take(values.cat.codes.to_numpy(), allow_fill=True,
+                                                            fill_value=np.nan)
+            restored[column] = pd.Series(labels.array, index=df.index)
+    return restored
+
+
+class MarketplaceData:
+    def __init__(self, df=None, validation_report=None, approximate=False, sales_column='Estimated_Sales'):
+        self._df = df
+        self.validation_report = validation_report
+        self._approximate = approximate
+        self._sales_column = sales_column
+        self._tables = {}
+        self.version = next(_VERSIONS)  # Process-unique; changes whenever the frame or an option changes
+        self.profiler = None  # Instrumentation.Profiler; when set, each aggregate computation is timed
+
+    @classmethod
+    def from_csv(cls, csv_file_path, quarantine_path=None, snapshot_store=None, check_duplicates=True):
+        """Load and validate a CSV; invalid rows go to <csv>.quarantine.csv by default"""
+        frame = pd.read_csv(csv_file_path, dtype={column: 'category' for column in LABEL_COLUMNS})
+        return cls.from_frame(frame, quarantine_path or default_quarantine_path(csv_file_path), snapshot_store,
+                              check_duplicates)
+
+    @classmethod
+    def from_frame(cls, df, quarantine_path=None, snapshot_store=None, check_duplicates=True):
+        """Validate and derive columns; check_duplicates=False skips the duplicate-key check
+
+        `df` itself is left untouched; the derived columns go on a new frame.
+        """
+        df, report = validate_frame(df, quarantine_path, check_duplicates)  # Also cleans column names
+        print_report(report)
+        df = df.assign(**_label_strings(df), Supply_Demand_Ratio=df['Quantity'] / df['Demand'],
+                       Estimated_Sales=np.minimum(df['Demand'], df['Quantity']))
+        print(f"✅ Data loaded successfully! {len(df)} records from {len(df['Store Name'].unique())} stores.")
+        if snapshot_store is not None:
+            snapshot_store.append(df)
+        return cls(df, report)
+
+    @classmethod
+    def from_aggregates(cls, tables, approximate=False, sales_column='Estimated_Sales'):
+        """A frame-less instance serving precomputed tables (plot workers, merged shard results)
+
+        Aggregates derived only from other aggregates are still computed on
+        demand from the shipped tables.
+        """
+        data = cls(approximate=approximate, sales_column=sales_column)
+        data._tables.update(tables)
+        return data
+
+    # ---- frame and options; changing any of them drops the memoized tables --
+
+    def _invalidate(self):
+        self._tables.clear()
+        self.version = next(_VERSIONS)
+
+    @property
+    def df(self):
+        return self._df
+
+    @df.setter
+    def df(self, df):
+        self._df = df
+        self._invalidate()
+
+    @property
+    def approximate(self):
+        return self._approximate
+
+    @approximate.setter
+    def approximate(self, value):
+        if value != self._approximate:
+            self._approximate = value
+            self._invalidate()
+
+    @property
+    def sales_column(self):
+        return self._sales_column
+
+    @sales_column.setter
+    def sales_column(self, value):
+        if value != self._sales_column:
+            self._sales_column = value
+            self._invalidate()
+
+    def options(self):
+        return {'approximate': self._approximate, 'sales_column': self._sales_column}
+
+    # ---- aggregates --------------------------------------------------------
+
+    def aggregate(self, name):
+        """Memoized aggregate table `name`, computing its dependencies first"""
+        if name not in self._tables:
+            spec = AGGREGATES[name]
+            if self._df is None and not spec.needs:
+                raise KeyError(f"Aggregate '{name}' was not shipped with this data")
+            needed = [self.aggregate(need) for need in spec.needs]
+            with self.profiler.stage(f'aggregate:{name}') if self.profiler else nullcontext():
+                self._tables[name] = spec.compute(self, *needed)
+        return self._tables[name]
+
+    def aggregates(self, names):
+        """{name: table} for `names`; dependencies are computed first, and only when missing"""
+        return {name: self.aggregate(name) for name in names}
+
+    def insights(self, kind, **filters):
+        """JSON-ready insight `kind` (see Insights.INSIGHTS), memoized per dataset version"""
+        from Insights import insights
+        return insights(self, kind, **filters)
+
+
+# =============================================================================
+# AGGREGATE DEFINITIONS
+# =============================================================================
+
+@aggregate('rows')
+def _rows(data):
+    return data.df[['Store Name', 'Store Location', 'Product Name', 'Product Category', 'Demand', 'Quantity',
+                    'FootFall', 'Supply_Demand_Ratio']]
+
+
+def _item_labels(items):
+    return (items['Product Name'].str[:15] + '\n' + items['Store Name'].str[:12] + '\n' + items['Store Location'])
+
+
+@aggregate('understocked_top', needs=['rows'])
+def _understocked_top(data, rows):
+    understocked = rows[rows['Supply_Demand_Ratio'] < 0.8]
+    understocked = understocked.nsmallest(10, 'Supply_Demand_Ratio').copy()
+    understocked['Item_Label'] = _item_labels(understocked)
+    return understocked[['Item_Label', 'Supply_Demand_Ratio']]
+
+
+@aggregate('overstocked_top', needs=['rows'])
+def _overstocked_top(data, rows):
+    overstocked = rows[rows['Supply_Demand_Ratio'] > 1.5]
+    overstocked = overstocked.nlargest(10, 'Supply_Demand_Ratio').copy()
+    overstocked['Item_Label'] = _item_labels(overstocked)
+    return overstocked[['Item_Label', 'Supply_Demand_Ratio']]
+
+
+@aggregate('marketplace_totals')
+def _marketplace_totals(data):
+    df = data.df
+    metrics = ['Total Inventory', 'Total Demand', 'Avg FootFall', 'Total Stores', 'Unique Products']
+    values = [
+        df['Quantity'].sum(),
+        df['Demand'].sum(),
+        df['FootFall'].mean(),
+        distinct_count(df[['Store Name', 'Store Location']], data.approximate),
+        distinct_count(df['Product Name'], data.approximate)
+    ]
+    return pd.DataFrame({'Metric': metrics, 'Value': values})
+
+
+@aggregate('location_metrics')
+def _location_metrics(data):
+    return data.df.groupby('Store Location').agg({
+        'Quantity': 'sum',
+        'Demand': 'sum',
+        'FootFall': 'mean'
+    }).reset_index().sort_values('Demand', ascending=False)
+
+
+@aggregate('store_location_metrics')
+def _store_location_metrics(data):
+    return data.df.groupby(['Store Name', 'Store Location']).agg({
+        'Quantity': 'sum',
+        'Demand': 'sum',
+        'FootFall': 'mean'
+    }).reset_index()
+
+
+@aggregate('store_rankings', needs=['store_location_metrics'])
+def _store_rankings(data, store_metrics):
+    store_metrics = store_metrics.copy()
+    store_metrics['Sales_Potential'] = (store_metrics['Demand'] * store_metrics['FootFall'] / 100).round(1)
+    store_metrics = store_metrics.sort_values('Sales_Potential', ascending=True)
+    store_metrics['Store_Label'] = (store_metrics['Store Name'] + ' (' + store_metrics['Store Location'] + ')')
+    return store_metrics
+
+
+@aggregate('store_metrics')
+def _store_metrics(data):
+    store_metrics = data.df.groupby('Store Name').agg({
+        'Quantity': 'sum',
+        'Demand': 'sum',
+        'FootFall': 'mean'
+    }).reset_index()
+    store_metrics['Sales_Potential'] = store_metrics['Demand'] * store_metrics['FootFall'] / 100
+    return store_metrics
+
+
+@aggregate('store_demand')
+def _store_demand(data):
+    return data.df.groupby('Store Name').agg({
+        'Demand': 'sum'
+    }).reset_index().sort_values('Demand', ascending=False)
+
+
+@aggregate('category_metrics')
+def _category_metrics(data):
+    return data.df.groupby('Product Category').agg({
+        'Quantity': 'sum',
+        'Demand': 'sum',
+        'FootFall': 'mean'
+    }).reset_index()
+
+
+@aggregate('product_location_demand')
+def _product_location_demand(data):
+    return data.df.pivot_table(values='Demand', index='Product Name', columns='Store Location',
+                               aggfunc='sum').fillna(0)
+
+
+@aggregate('best_locations')
+def _best_locations(data):
+    product_best = data.df.groupby(['Product Name', 'Store Location']).agg({
+        'Demand': 'sum'
+    }).reset_index()
+    # First location with the peak demand per product (same tie-break as idxmax)
+    best_locations = product_best.loc[
+        product_best.groupby('Product Name')['Demand'].idxmax()
+    ].reset_index(drop=True)
+    return best_locations.sort_values('Demand', ascending=True)
+
+
+@aggregate('product_store_demand')
+def _product_store_demand(data):
+    return data.df.pivot_table(values='Demand', index='Product Name', columns='Store Name',
+                               aggfunc='sum').fillna(0)
+
+
+@aggregate('product_metrics')
+def _product_metrics(data):
+    return data.df.groupby('Product Name').agg({
+        'Demand': 'sum',
+        'Quantity': 'sum',
+        'FootFall': 'mean'
+    }).reset_index().sort_values('Demand', ascending=True)
+
+
+@aggregate('ratio_heatmap')
+def _ratio_heatmap(data):
+    return data.df.pivot_table(values='Supply_Demand_Ratio', index='Product Name', columns='Store Name',
+                               aggfunc='mean').fillna(0)
+
+
+@aggregate('location_conversion')
+def _location_conversion(data):
+    location_conversion = data.df.groupby('Store Location').agg({
+        'FootFall': 'sum',
+        data.sales_column: 'sum'
+    }).reset_index().rename(columns={data.sales_column: 'Estimated_Sales'})
+    location_conversion['Conversion_Rate'] = (location_conversion['Estimated_Sales'] /
+                                              location_conversion['FootFall']) * 100
+    return location_conversion.sort_values('Conversion_Rate', ascending=False)
+
+
+@aggregate('store_conversion')
+def _store_conversion(data):
+    store_conversion = data.df.groupby(['Store Name', 'Store Location']).agg({
+        'FootFall': 'sum',
+        data.sales_column: 'sum'
+    }).reset_index().rename(columns={data.sales_column: 'Estimated_Sales'})
+    store_conversion['Conversion_Rate'] = (store_conversion['Estimated_Sales'] /
+                                           store_conversion['FootFall']) * 100
+    return store_conversion
+
+
+@aggregate('store_conversion_rankings', needs=['store_conversion'])
+def _store_conversion_rankings(data, store_conversion):
+    store_conversion = store_conversion.copy()
+    store_conversion['Store_Label'] = (store_conversion['Store Name'] + '\n(' +
+                                       store_conversion['Store Location'] + ')')
+    return store_conversion.sort_values('Conversion_Rate', ascending=True)
+
+
+@aggregate('improvement_potential', needs=['store_conversion'])
+def _improvement_potential(data, store_conversion):
+    store_conversion = store_conversion.copy()
+    best_rate = store_conversion['Conversion_Rate'].max()
+    store_conversion['Improvement_Potential'] = best_rate - store_conversion['Conversion_Rate']
+    store_conversion['Store_Label'] = (store_conversion['Store Name'] + '\n(' +
+                                       store_conversion['Store Location'] + ')')
+    # Only show stores with improvement potential > 1%
+    improvement_data = store_conversion[store_conversion['Improvement_Potential'] > 1.0].copy()
+    return improvement_data.sort_values('Improvement_Potential', ascending=True)
+
+
+# =============================================================================
+# GRAPH REGISTRY
+# =============================================================================
+
+# `table` is the aggregate whose content fully determines the figure (used for
+# render-cache keys); `needs` lists every aggregate the graph reads.
+GraphSpec = namedtuple('GraphSpec', ['id', 'title', 'module', 'method', 'table', 'needs'])
+GRAPHS = {}
+
+
+def register_graph(spec):
+    """Plugin entry point: add (or replace) a graph in the registry"""
+    GRAPHS[spec.id] = spec
+    return spec
+
+
+for _spec in [
+    GraphSpec('1a', 'Supply vs Demand Overview', 'DaaVis2', 'graph_1a_supply_demand_overview', 'rows', ('rows',)),
+    GraphSpec('1b', 'Critical Understocked Items', 'DaaVis2', 'graph_1b_critical_understocked',
+              'understocked_top', ('understocked_top',)),
+    GraphSpec('1c', 'Overstocked Items', 'DaaVis2', 'graph_1c_overstocked_items',
+              'overstocked_top', ('overstocked_top',)),
+    GraphSpec('2a', 'Marketplace Totals', 'DaaVis2', 'graph_2a_marketplace_totals',
+              'marketplace_totals', ('marketplace_totals',)),
+    GraphSpec('2b', 'Location Performance', 'DaaVis2', 'graph_2b_location_performance',
+              'location_metrics', ('location_metrics',)),
+    GraphSpec('2c', 'Store Rankings', 'DaaVis2', 'graph_2c_store_rankings', 'store_rankings', ('store_rankings',)),
+    GraphSpec('2d', 'Market Share', 'DaaVis2', 'graph_2d_market_share', 'store_demand', ('store_demand',)),
+    GraphSpec('3a', 'Product-Location Heatmap', 'DaaVis2', 'graph_3a_product_location_heatmap',
+              'product_location_demand', ('product_location_demand',)),
+    GraphSpec('3b', 'Best Locations per Product', 'DaaVis2', 'graph_3b_best_locations_per_product',
+              'best_locations', ('best_locations',)),
+    GraphSpec('3c', 'Product-Store Heatmap', 'DaaVis2', 'graph_3c_product_store_heatmap',
+              'product_store_demand', ('product_store_demand',)),
+    GraphSpec('3d', 'Overall Product Rankings', 'DaaVis2', 'graph_3d_overall_product_rankings',
+              'product_metrics', ('product_metrics',)),
+    GraphSpec('4a', 'Location Conversion Rates', 'DaaVis2', 'graph_4a_location_conversion_rates',
+              'location_conversion', ('location_conversion',)),
+    GraphSpec('4b', 'FootFall vs Sales Scatter', 'DaaVis2', 'graph_4b_footfall_vs_sales_scatter',
+              'store_conversion', ('store_conversion',)),
+    GraphSpec('4c', 'Store Conversion Rankings', 'DaaVis2', 'graph_4c_store_conversion_rankings',
+              'store_conversion_rankings', ('store_conversion_rankings',)),
+    GraphSpec('4d', 'Improvement Opportunities', 'DaaVis2', 'graph_4d_conversion_improvement_potential',
+              'improvement_potential', ('improvement_potential',)),
+    GraphSpec('v1', 'Supply vs Demand Gap Analysis', 'DataVis', 'visualization_1_supply_demand_gap',
+              'rows', ('rows',)),
+    GraphSpec('v2', 'Store Performance Comparison', 'DataVis', 'visualization_2_store_performance',
+              'store_metrics', ('store_metrics',)),
+    GraphSpec('v3', 'Category Performance Matrix', 'DataVis', 'visualization_3_category_performance',
+              'category_metrics', ('category_metrics',)),
+    GraphSpec('v4', 'Inventory Optimization Heatmap', 'DataVis', 'visualization_4_inventory_heatmap',
+              'ratio_heatmap', ('ratio_heatmap',)),
+    GraphSpec('v5', 'Top Products by Demand', 'DataVis', 'visualization_5_top_products_demand',
+              'product_metrics', ('product_metrics',)),
+]:
+    register_graph(_spec)
+
+
+def graph_ids(module=None):
+    """Registered graph ids in registration order, optionally only those drawn by `module`"""
+    return [spec.id for spec in GRAPHS.values() if module is None or spec.module == module]
+
+
+def select_graphs(patterns=None):
+    """Graph ids matching any id or glob in `patterns` (e.g. ['2a', '4*']), in registry order
+
+    Patterns may also be comma separated.  Raises ValueError for a pattern that
+    matches nothing.
+    """
+    if not patterns:
+        return graph_ids()
+    patterns = [p.strip().lower() for pattern in patterns for p in pattern.split(',') if p.strip()]
+    unmatched = [p for p in patterns if not fnmatch.filter(GRAPHS, p)]
+    if unmatched:
+        raise ValueError(f"No graphs match {unmatched}; known ids: {', '.join(GRAPHS)}")
+    return [graph_id for graph_id in GRAPHS if any(fnmatch.fnmatchcase(graph_id, p) for p in patterns)]
+
+
+def required_aggregates(ids):
+    """Union of the aggregates the given graphs need, in dependency order"""
+    return aggregate_order([need for graph_id in ids for need in GRAPHS[graph_id].needs])
+
+
+# =============================================================================
+# SCHEDULER
+# =============================================================================
+
+def _visualizer_for(spec, data):
+    module = importlib.import_module(spec.module)
+    return module.MarketplaceVisualizer.from_data(data)
+
+
+def _render_task(spec, tables, options, path, dpi, figures=None, track_memory=False):
+    """Worker-process body: plot one graph from shipped tables, save it and release the figure"""
+    import matplotlib
+    matplotlib.use('Agg')
+    from FigureManager import configure_figures, release_figure
+    from Instrumentation import RssSampler
+
+    configure_figures(**(figures or {}))
+    sampler = RssSampler() if track_memory else nullcontext()
+    start = time.perf_counter()
+    with sampler:
+        viz = _visualizer_for(spec, MarketplaceData.from_aggregates(tables, **options))
+        fig = viz.render_graph(spec.id)
+        if fig is not None:
+            fig.savefig(path, dpi=dpi, bbox_inches='tight')
+            release_figure(fig)
+    result = {'graph': spec.id, 'status': 'skipped' if fig is None else 'ok', 'path': None if fig is None else path,
+              'seconds': round(time.perf_counter() - start, 4)}
+    if track_memory:
+        result['peak_rss_mb'] = round(sampler.peak_mb, 1)
+    return result
+
+
+def render_graphs(data, ids, output_dir, workers=1, fmt='png', dpi=300, profiler=None, figures=None):
+    """Compute the aggregates `ids` need once, then plot them (in parallel when workers > 1)
+
+    `figures` holds FigureManager.configure_figures options (pool_size,
+    max_rss_mb) applied in every plotting process.  With a memory-tracking
+    profiler each graph also reports the peak RSS of the process that drew it.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    tables = data.aggregates(dict.fromkeys(need for graph_id in ids for need in GRAPHS[graph_id].needs))
+    track_memory = profiler is not None and profiler.track_memory
+    jobs = [(GRAPHS[graph_id], os.path.join(output_dir, f"{graph_id}.{fmt}")) for graph_id in ids]
+    arguments = [(spec, {n: tables[n] for n in spec.needs}, data.options(), path, dpi, figures, track_memory)
+                 for spec, path in jobs]
+
+    if workers <= 1 or len(arguments) <= 1:
+        results = [_render_task(*task) for task in arguments]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_render_task, *zip(*arguments)))
+
+    if profiler is not None:
+        for result in results:
+            fields = {key: result[key] for key in ('status', 'peak_rss_mb') if key in result}
+            profiler.record(f"graph:{result['graph']}", result['seconds'], **fields)
+    return results
@@ -0,0 +1,319 @@
+# Golden-Output Performance Harness - values and cost of every graph, checked against golden files
+# File: PerfHarness.py
+#
+#   python PerfHarness.py                      # check values against golden/ (bundled and 10k rows)
+#   python PerfHarness.py --full               # also the 250k frame, which takes minutes
+#   python PerfHarness.py --check-perf         # also check timings and memory against this machine's baseline
+#   python PerfHarness.py --update             # accept current values as golden
+#   python PerfHarness.py --update-perf        # re-baseline timings and memory on this machine
+#   python PerfHarness.py --sizes bundled 50000 --graphs '4*' v1 --check-perf --render
+#
+# For every registered graph (DaaVis2 graph_* and DataVis visualization_*) and
+# every dataset - the bundled CSV plus deterministic synthetic frames of the
+# requested sizes - the harness captures:
+#   * the aggregate table the graph plots (inline when small, otherwise shape,
+#     column sums, order-sensitive checksums and label digests)
+#   * what the graph method itself reports when it is drawn (the 4C median
+#     split it coloured the bars with, the insights dict visualization_*
+#     returns), read from render_graph's plot_values
+#   * wall time per stage (best of --repeat runs) and the peak RSS above the
+#     process baseline, each dataset measured in a fresh process
+# A run fails when any value diverges from golden/<dataset>/<graph>.json.
+# With --check-perf it also fails when a stage is slower / the peak RSS higher
+# than golden/perf.json beyond the tolerances.  Those baselines are machine
+# specific, so perf.json is not committed: the first --check-perf run of every
+# graph records it, and only recording or --update-perf ever writes it.
+
+import contextlib
+import importlib
+import io
+import json
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from Instrumentation import Profiler, current_rss_mb
+from MetricsCore import DEFAULT_DATA_PATH, GRAPHS, MarketplaceData, select_graphs
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+DEFAULT_SIZES = ['bundled', '10000']
+FULL_SIZES = DEFAULT_SIZES + ['250000']  # --full; golden/250000 is kept for it
+MAX_INLINE_ROWS = 200
+VALUE_RTOL = 1e-9
+
+
+# =============================================================================
+# DATASETS
+# =============================================================================
+
+LOCATIONS = ['Headingley', 'Hyde Park', 'Chapel Allerton', 'Horsforth', 'Leeds City Centre', 'Roundhay',
+             'Kirkstall', 'Meanwood', 'Armley', 'Beeston', 'Pudsey', 'Otley']
+CATEGORIES = ['Clothing', 'Food', 'Home', 'Beverages', 'Crafts', 'Accessories', 'Books']
+
+
+def synthetic_frame(rows, seed=0):
+    """Deterministic marketplace rows; a few are invalid (zero demand, duplicates) on purpose"""
+    rng = np.random.default_rng(seed)
+    stores = max(5, min(rows // 400, 2000))
+    products = max(10, min(rows // 100, 400))
+    product_category = rng.integers(0, len(CATEGORIES), products)
+    product = rng.integers(0, products, rows)
+    return pd.DataFrame({
+        'Store Name': pd.Series([f'Store {i:04d}' for i in range(stores)]).to_numpy()[rng.integers(0, stores, rows)],
+        'Store Location': np.array(LOCATIONS)[rng.integers(0, len(LOCATIONS), rows)],
+        'Product Name': pd.Series([f'Product {i:03d}' for i in range(products)]).to_numpy()[product],
+        'Product Category': np.array(CATEGORIES)[product_category[product]],
+        'Quantity': rng.integers(0, 160, rows),
+        'Demand': rng.integers(0, 120, rows),
+        'FootFall': rng.integers(1, 400, rows),
+    })
+
+
+def load_dataset(name):
+    if name == 'bundled':
+        return pd.read_csv(DEFAULT_DATA_PATH)
+    return synthetic_frame(int(name))
+
+
+# =============================================================================
+# SNAPSHOTS
+# =============================================================================
+
+def _labels_digest(values):
+    """Order-sensitive 64-bit digest of a sequence of labels"""
+    hashes = pd.util.hash_pandas_object(pd.Series(values, dtype=str), index=False).to_numpy()
+    return format(int((hashes * np.arange(1, len(hashes) + 1, dtype=np.uint64)).sum()), '016x')
+
+
+def table_snapshot(table):
+    """JSON-ready description of an aggregate table, detailed enough to catch value and order changes"""
+    frame = table.to_frame() if isinstance(table, pd.Series) else table
+    snapshot = {
+        'shape': list(frame.shape),
+        'columns': [str(column) for column in frame.columns],
+        'index': _labels_digest(frame.index),
+        'summary': {},
+    }
+    weights = 1 + np.arange(len(frame)) % 97  # Order-sensitive, still tolerant to float noise
+    for column in frame.columns:
+        values = frame[column]
+        if pd.api.types.is_numeric_dtype(values):
+            numbers = values.to_numpy(dtype=np.float64)
+            snapshot['summary'][str(column)] = {'sum': float(np.nansum(numbers)),
+                                                'weighted': float(np.nansum(numbers * weights))}
+        else:
+            snapshot['summary'][str(column)] = {'labels': _labels_digest(values)}
+    if len(frame) <= MAX_INLINE_ROWS:
+        snapshot['data'] = json.loads(frame.reset_index().to_json(orient='split', index=False,
+                                                                  double_precision=15))
+    return snapshot
+
+
+def capture(data, graph_ids, profiler):
+    """{graph_id: golden record} for `graph_ids`, timing each table and figure build on `profiler`
+
+    Every graph method is really called (figures are built, not saved), so the
+    recorded plot values and insights are the ones the graph itself produced.
+    """
+    from FigureManager import release_figure
+
+    records = {}
+    visualizers = {}
+    data.profiler = profiler
+    for graph_id in graph_ids:
+        spec = GRAPHS[graph_id]
+        with profiler.stage(f'table:{graph_id}'):
+            table = data.aggregate(spec.table)
+        if spec.module not in visualizers:
+            visualizers[spec.module] = importlib.import_module(spec.module).MarketplaceVisualizer.from_data(data)
+        viz = visualizers[spec.module]
+        with profiler.stage(f'plot:{graph_id}'):
+            release_figure(viz.render_graph(graph_id))
+        record = {'graph': graph_id, 'method': f'{spec.module}.{spec.method}', 'table': table_snapshot(table)}
+        plot_values = dict(viz.plot_values)
+        if 'insights' in plot_values:
+            record['insights'] = plot_values.pop('insights')
+        if plot_values:
+            record['plot_values'] = plot_values
+        records[graph_id] = record
+    return records
+
+
+def measure(dataset, graph_ids, repeat=3, render=False, dpi=72):
+    """Snapshots and perf numbers for one dataset; meant to run in a fresh process"""
+    import matplotlib
+    matplotlib.use('Agg')
+
+    frame = load_dataset(dataset)
+    base_rss = current_rss_mb()
+    best = {}
+    peak_rss = base_rss
+    for _ in range(repeat):
+        profiler = Profiler(track_memory=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            with profiler.stage('load'):
+                data = MarketplaceData.from_frame(frame.copy())
+            records = capture(data, graph_ids, profiler)
+            if render:
+                from MetricsCore import render_graphs
+                with tempfile.TemporaryDirectory() as output_dir:
+                    render_graphs(data, graph_ids, output_dir, dpi=dpi, profiler=profiler)
+        for record in profiler.records:
+            stage = record['stage']
+            best[stage] = min(best.get(stage, record['seconds']), record['seconds'])
+            peak_rss = max(peak_rss, record.get('peak_rss_mb', 0))
+        del data
+    return {'records': records,
+            'perf': {'stages': best, 'total_seconds': round(sum(best.values()), 4),
+                     'peak_rss_mb': round(peak_rss - base_rss, 1), 'rows': int(len(frame))}}
+
+
+def _measure_in_subprocess(dataset, graph_ids, repeat, render, dpi):
+    with mp.get_context('spawn').Pool(1) as pool:
+        return pool.apply(measure, (dataset, graph_ids, repeat, render, dpi))
+
+
+# =============================================================================
+# COMPARISON
+# =============================================================================
+
+def _diff(expected, actual, path=''):
+    """List of human-readable differences between two JSON-like values"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        problems = []
+        for key in sorted(set(expected) | set(actual)):
+            if key not in actual or key not in expected:
+                problems.append(f"{path}/{key}: {'missing' if key not in actual else 'unexpected'}")
+            else:
+                problems += _diff(expected[key], actual[key], f"{path}/{key}")
+        return problems
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return [f"{path}: length {len(expected)} -> {len(actual)}"]
+        return [problem for i, (e, a) in enumerate(zip(expected, actual)) for problem in _diff(e, a, f"{path}[{i}]")]
+    if isinstance(expected, (int, float)) and isinstance(actual, (int, float)) \
+            and not isinstance(expected, bool) and not isinstance(actual, bool):
+        if np.isclose(expected, actual, rtol=VALUE_RTOL, atol=0, equal_nan=True):
+            return []
+    elif expected == actual:
+        return []
+    return [f"{path}: {expected!r} -> {actual!r}"]
+
+
+def compare_perf(expected, actual, time_tolerance, memory_tolerance, min_seconds=0.05, min_mb=20):
+    """Regressions of `actual` against baseline `expected` beyond the tolerances (noise floors apply)"""
+    problems = []
+    for stage, seconds in actual['stages'].items():
+        baseline = expected['stages'].get(stage)
+        if baseline is not None and seconds > baseline * (1 + time_tolerance) and seconds - baseline > min_seconds:
+            problems.append(f"{stage}: {baseline:.3f}s -> {seconds:.3f}s")
+    baseline = expected['peak_rss_mb']
+    if actual['peak_rss_mb'] > baseline * (1 + memory_tolerance) and actual['peak_rss_mb'] - baseline > min_mb:
+        problems.append(f"peak RSS: {baseline:.1f} MB -> {actual['peak_rss_mb']:.1f} MB")
+    return problems
+
+
+def _golden_path(dataset, graph_id):
+    return os.path.join(GOLDEN_DIR, dataset, f'{graph_id}.json')
+
+
+def _write_json(path, value):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as handle:
+        json.dump(value, handle, indent=1, sort_keys=True)
+        handle.write('\n')
+
+
+def run(datasets, graph_ids, update=False, update_perf=False, time_tolerance=0.5, memory_tolerance=0.25,
+        repeat=3, render=False, dpi=72, check_perf=False):
+    """Measure every dataset and check (or rewrite) the golden files; returns the list of failures
+
+    Timings and memory are only compared (and the local baseline only
+    recorded) with `check_perf`; `update_perf` re-records the baseline.
+    """
+    perf_path = os.path.join(GOLDEN_DIR, 'perf.json')
+    use_perf = check_perf or update_perf
+    perf_changed = False
+    perf_golden = {}
+    if os.path.exists(perf_path):
+        with open(perf_path) as handle:
+            perf_golden = json.load(handle)
+    perf_key = 'render' if render else 'aggregate'
+    failures = []
+
+    for dataset in datasets:
+        # A single run settles the values; best-of-repeat only matters for timings (the
+        # annotated heatmaps take minutes per run on the 250k frame)
+        result = _measure_in_subprocess(dataset, graph_ids, repeat if use_perf else 1, render, dpi)
+        perf = result['perf']
+        print(f"📏 {dataset}: {perf['rows']:,} rows, {perf['total_seconds']:.3f}s, "
+              f"peak +{perf['peak_rss_mb']:.1f} MB")
+
+        for graph_id, record in result['records'].items():
+            path = _golden_path(dataset, graph_id)
+            if update:
+                _write_json(path, record)
+            elif not os.path.exists(path):
+                failures.append(f"{dataset}/{graph_id}: no golden file (run with --update)")
+            else:
+                with open(path) as handle:
+                    failures += [f"{dataset}/{graph_id}{problem}" for problem in _diff(json.load(handle), record)]
+
+        if not use_perf:
+            continue
+        baseline = perf_golden.get(perf_key, {}).get(dataset)
+        if update_perf:
+            perf_golden.setdefault(perf_key, {})[dataset] = perf
+            perf_changed = True
+        elif baseline is None:
+            if sorted(graph_ids) == sorted(GRAPHS):  # A subset's peak RSS would understate the full run
+                perf_golden.setdefault(perf_key, {})[dataset] = perf
+                perf_changed = True
+                print(f"   no perf baseline for {dataset}; recorded this run")
+            else:
+                print(f"   no perf baseline for {dataset}; run every graph to record one")
+        else:
+            failures += [f"{dataset} perf {problem}"
+                         for problem in compare_perf(baseline, perf, time_tolerance, memory_tolerance)]
+
+    if perf_changed:
+        _write_json(perf_path, perf_golden)
+    return failures
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check graph values, timings and memory against golden files")
+    sizes = parser.add_mutually_exclusive_group()
+    sizes.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES,
+                       help="'bundled' and/or synthetic row counts (default: %(default)s)")
+    sizes.add_argument('--full', action='store_const', dest='sizes', const=FULL_SIZES,
+                       help=f"Check every golden dataset: {' '.join(FULL_SIZES)}")
+    parser.add_argument('--graphs', nargs='+', help="Graph ids or globs (default: all)")
+    parser.add_argument('--update', action='store_true', help="Rewrite golden values")
+    parser.add_argument('--check-perf', action='store_true',
+                        help="Also check timings and memory against this machine's baseline (recorded on first use)")
+    parser.add_argument('--update-perf', action='store_true', help="Rewrite this machine's perf baseline")
+    parser.add_argument('--time-tolerance', type=float, default=0.5, help="Allowed slowdown fraction per stage")
+    parser.add_argument('--memory-tolerance', type=float, default=0.25, help="Allowed peak RSS growth fraction")
+    parser.add_argument('--repeat', type=int, default=3, help="Timing runs per dataset (best is kept)")
+    parser.add_argument('--render', action='store_true', help="Also time saving every graph (with --check-perf)")
+    parser.add_argument('--dpi', type=int, default=72)
+    args = parser.parse_args()
+
+    failures = run(args.sizes, select_graphs(args.graphs), args.update, args.update_perf, args.time_tolerance,
+                   args.memory_tolerance, args.repeat, args.render, args.dpi, args.check_perf)
+    if failures:
+        print(f"❌ {len(failures)} regression(s):")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    if args.update:
+        print("✅ Golden files updated")
+    else:
+        print("✅ Golden values and performance baselines hold" if args.check_perf else "✅ Golden values hold")
@@ -0,0 +1,296 @@
+# Incremental Sync - Firestore `products` collection -> local columnar store
+# File: ProductSync.py
+#
+# Instead of re-exporting the whole `products` collection on every dashboard
+# refresh, each sync asks the source only for documents whose `dateAdded`
+# (written by AddProductActivity / HomeActivity) is at or after the persisted
+# high-water mark.  The delta is appended to the store as a new Parquet
+# segment and nothing already stored is read or rewritten, so the cost of a
+# sync follows the number of changed documents rather than the catalog size.
+# Readers take the latest version of each document; once more than
+# MAX_SEGMENTS have piled up, the next read folds them into one.
+#
+# LIMITATION: only the sync is incremental.  No aggregates are maintained in
+# the store; after each sync the first reader (MarketplaceData.from_frame via
+# to_frame) re-validates and re-aggregates the whole catalog, because the
+# validation rules (duplicate keys, non-positive demand) are catalog-wide.
+# Later reads of an unchanged store are served from the Insights InsightStore
+# (see VisCLI insights --cache).
+#
+# LIMITATION: deletions are not propagated.  A document removed from
+# `products` never shows up in a `changes_since` query, so it stays in the
+# store; delete the store directory and sync again to drop it.
+#
+# NOTE: the Android app only sets `dateAdded` when a product is created.  Edits
+# are only picked up if the writer also bumps the timestamp field, so pass
+# `timestamp_field='dateUpdated'` (or similar) once the app writes one.
+#
+# NOTE: AddProductActivity / HomeActivity write name, storeName, storeAddress,
+# quantity, price, category and dateAdded, but not `demand` or `footFall`.
+# The graphs cannot be drawn without them, so whatever feeds those two fields
+# into `products` must run before the sync; documents lacking either one stop
+# the sync with a ValueError instead of being stored and quarantined later.
+
+import glob
+import json
+import os
+
+import pandas as pd
+
+# Firestore document field -> visualizer column
+FIELD_MAP = {
+    'storeName': 'Store Name',
+    'storeAddress': 'Store Location',
+    'name': 'Product Name',
+    'category': 'Product Category',
+    'quantity': 'Quantity',
+    'demand': 'Demand',
+    'footFall': 'FootFall',
+}
+
+# Fields every synced document must carry (the app itself does not write the last two)
+REQUIRED_FIELDS = ['storeName', 'name', 'quantity', 'demand', 'footFall']
+
+KEY_COLUMNS = ['Store Name', 'Store Location', 'Product Name', 'Product Category']
+
+# Segments tolerated before a read compacts them
+MAX_SEGMENTS = 32
+
+
+# =============================================================================
+# SOURCES
+# =============================================================================
+
+class FirestoreSource:
+    """Reads changed documents from Firestore (or the local emulator)
+
+    The client library honours FIRESTORE_EMULATOR_HOST, so pointing that at a
+    running emulator is enough to sync against local test data.
+    """
+
+    def __init__(self, project=None, collection='products', timestamp_field='dateAdded', client=None):
+        if client is None:
+            try:
+                from google.cloud import firestore
+            except ImportError:
+                raise ImportError("FirestoreSource needs google-cloud-firestore: pip install google-cloud-firestore")
+            client = firestore.Client(project=project)
+        self.client = client
+        self.collection = collection
+        self.timestamp_field = timestamp_field
+
+    def changes_since(self, high_water_mark):
+        """Yield (doc_id, data) for documents with timestamp >= high_water_mark, oldest first"""
+        query = self.client.collection(self.collection)
+        if high_water_mark is not None:
+            query = query.where(self.timestamp_field, '>=', high_water_mark)
+        query = query.order_by(self.timestamp_field)
+        for snapshot in query.stream():
+            yield snapshot.id, snapshot.to_dict()
+
+
+class FixtureDirectorySource:
+    """Reads product documents from a directory of JSON fixtures
+
+    Each *.json file holds either one document or a list of documents.  The
+    document id is taken from an `id` field, falling back to the file name.
+    """
+
+    def __init__(self, directory, timestamp_field='dateAdded'):
+        self.directory = directory
+        self.timestamp_field = timestamp_field
+
+    def changes_since(self, high_water_mark):
+        documents = []
+        for path in sorted(glob.glob(os.path.join(self.directory, '*.json'))):
+            with open(path, encoding='utf-8') as fh:
+                payload = json.load(fh)
+            if isinstance(payload, dict):
+                payload = [payload]
+            stem = os.path.splitext(os.path.basename(path))[0]
+            for position, doc in enumerate(payload):
+                doc = dict(doc)
+                doc_id = str(doc.pop('id', stem if len(payload) == 1 else f"{stem}-{position}"))
+                stamp = doc.get(self.timestamp_field)
+                if stamp is None:
+                    continue
+                if high_water_mark is None or stamp >= high_water_mark:
+                    documents.append((doc_id, doc))
+        documents.sort(key=lambda item: item[1][self.timestamp_field])
+        return iter(documents)
+
+
+# =============================================================================
+# LOCAL COLUMNAR STORE
+# =============================================================================
+
+class ProductStore:
+    """Append-only Parquet segments, the latest segment winning per document
+
+    Layout of `directory`:
+        state.json            high-water mark, ids seen at that mark, segment counter
+        segment-000001.parquet ... one file per sync that produced changes
+    """
+
+    STATE_FILE = 'state.json'
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.state = self._read_state()
+
+    # ---- state -------------------------------------------------------------
+
+    def _read_state(self):
+        path = os.path.join(self.directory, self.STATE_FILE)
+        if not os.path.exists(path):
+            return {'high_water_mark': None, 'ids_at_mark': [], 'next_segment': 1}
+        with open(path, encoding='utf-8') as fh:
+            return json.load(fh)
+
+    def _write_state(self):
+        path = os.path.join(self.directory, self.STATE_FILE)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump(self.state, fh)
+        os.replace(tmp_path, path)
+
+    @property
+    def high_water_mark(self):
+        return self.state['high_water_mark']
+
+    def segment_paths(self):
+        return sorted(glob.glob(os.path.join(self.directory, 'segment-*.parquet')))
+
+    # ---- reads -------------------------------------------------------------
+
+    def _read_segments(self, paths):
+        frame = pd.concat([pd.read_parquet(path) for path in paths], ignore_index=True)
+        return frame.drop_duplicates('doc_id', keep='last')
+
+    def to_frame(self):
+        """Current catalog in the same shape as product_data(in).csv"""
+        paths = self.segment_paths()
+        if not paths:
+            return pd.DataFrame(columns=['Store Name', 'Store Location', 'Product Name',
+                                         'Product Category', 'Quantity', 'Demand', 'FootFall'])
+        frame = self._read_segments(paths)
+        if len(paths) > MAX_SEGMENTS:
+            self._replace_segments(paths, frame)  # Already read in full, so folding costs one write
+        return frame.drop(columns=['doc_id', 'timestamp']).reset_index(drop=True)
+
+    # ---- writes ------------------------------------------------------------
+
+    def apply(self, delta):
+        """Append a delta segment; earlier versions of the same documents are shadowed, not rewritten"""
+        segment = os.path.join(self.directory, f"segment-{self.state['next_segment']:06d}.parquet")
+        delta.to_parquet(segment, index=False)
+        self.state['next_segment'] += 1
+
+    def _replace_segments(self, paths, frame):
+        target = os.path.join(self.directory, f"segment-{self.state['next_segment']:06d}.parquet")
+        frame.to_parquet(target, index=False)
+        self.state['next_segment'] += 1
+        self._write_state()
+        for path in paths:
+            os.remove(path)
+
+    def compact(self):
+        """Fold all segments into one (reads do this by themselves past MAX_SEGMENTS)"""
+        paths = self.segment_paths()
+        if len(paths) < 2:
+            return
+        self._replace_segments(paths, self._read_segments(paths))
+
+
+def documents_to_frame(documents, timestamp_field='dateAdded'):
+    """Flatten (doc_id, data) pairs into visualizer-shaped rows
+
+    Raises ValueError naming the documents that lack any of REQUIRED_FIELDS.
+    """
+    missing = {}
+    for doc_id, data in documents:
+        for field in REQUIRED_FIELDS:
+            if data.get(field) is None:
+                missing.setdefault(field, []).append(doc_id)
+    if missing:
+        details = '; '.join(f"{field}: {len(ids)} documents (e.g. {', '.join(ids[:3])})"
+                            for field, ids in missing.items())
+        raise ValueError(f"Product documents are missing required fields ({details}). The Android app does not "
+                         f"write 'demand' or 'footFall'; populate them before syncing.")
+
+    records = []
+    for doc_id, data in documents:
+        record = {column: data.get(field) for field, column in FIELD_MAP.items()}
+        record['doc_id'] = doc_id
+        record['timestamp'] = data[timestamp_field]
+        records.append(record)
+    frame = pd.DataFrame.from_records(records, columns=list(FIELD_MAP.values()) + ['doc_id', 'timestamp'])
+    for column in KEY_COLUMNS:
+        frame[column] = frame[column].fillna('').astype(str)
+    for column in ['Quantity', 'Demand', 'FootFall']:
+        frame[column] = pd.to_numeric(frame[column], errors='coerce').astype('float64')
+    return frame
+
+
+# =============================================================================
+# SYNC
+# =============================================================================
+
+def sync(source, store, timestamp_field='dateAdded'):
+    """Pull documents changed since the store's high-water mark and merge them
+
+    Documents are fetched with `>=` on the mark so nothing written in the same
+    millisecond as the last synced document is missed; ids already consumed at
+    exactly that mark are skipped.  Returns the number of documents applied.
+    """
+    mark = store.high_water_mark
+    seen_at_mark = set(store.state['ids_at_mark'])
+
+    documents = [(doc_id, data) for doc_id, data in source.changes_since(mark)
+                 if not (data.get(timestamp_field) == mark and doc_id in seen_at_mark)]
+    if not documents:
+        print("✅ Products already up to date.")
+        return 0
+
+    delta = documents_to_frame(documents, timestamp_field)
+    delta = delta.drop_duplicates('doc_id', keep='last')
+    store.apply(delta)
+
+    new_mark = max(data[timestamp_field] for _, data in documents)
+    at_mark = {doc_id for doc_id, data in documents if data[timestamp_field] == new_mark}
+    if new_mark == mark:
+        at_mark |= seen_at_mark
+    store.state['high_water_mark'] = new_mark
+    store.state['ids_at_mark'] = sorted(at_mark)
+    store._write_state()
+
+    print(f"✅ Synced {len(delta)} changed products (high-water mark {new_mark}).")
+    return len(delta)
+
+
+def load_visualizer(store):
+    """Build a DaaVis2 MarketplaceVisualizer over the synced catalog"""
+    from DaaVis2 import MarketplaceVisualizer
+    return MarketplaceVisualizer.from_dataframe(store.to_frame())
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Incrementally sync Firestore products into a local store")
+    parser.add_argument('store', help="Directory of the local product store")
+    parser.add_argument('--fixtures', help="Read documents from a fixture directory instead of Firestore")
+    parser.add_argument('--project', help="Firestore project id")
+    parser.add_argument('--timestamp-field', default='dateAdded')
+    parser.add_argument('--compact', action='store_true', help="Fold segments together after syncing")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        product_source = FixtureDirectorySource(args.fixtures, args.timestamp_field)
+    else:
+        product_source = FirestoreSource(args.project, timestamp_field=args.timestamp_field)
+    product_store = ProductStore(args.store)
+    sync(product_source, product_store, args.timestamp_field)
+    if args.compact:
+        product_store.compact()
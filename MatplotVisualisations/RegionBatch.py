@@ -0,0 +1,272 @@
+# Per-Region Batch Driver - full graph suite for every region / store group
+# File: RegionBatch.py
+#
+# The master frame is validated once in the parent and split once with the
+# groupby index (one pass, no repeated boolean filtering).  Each partition is
+# spilled to its own pickle and workers receive only labels, so under spawn no
+# process is sent the master frame; a worker reads a partition when it first
+# draws from it.  Each partition's graphs become two tasks (first and second
+# half), and partitions are dealt largest first, whole, onto the least-loaded
+# worker's queue, so a worker builds the aggregates of its own partitions only.
+# A worker that drains its own queue steals a task - the rest of a partition -
+# from the victim it last stole from, then from the others, so a handful of big
+# regions cannot leave the remaining cores idle and no partition's aggregates
+# are built more than twice.  The parent polls for results and watches worker
+# exit codes, so tasks of a worker that dies outside its per-task error
+# handling (an import, an OOM kill) are reported as errors instead of hanging
+# the run.  Output directories are named after the partition
+# label, with a numeric suffix when two labels clean up to the same name.
+
+import importlib
+import json
+import multiprocessing as mp
+import os
+import queue
+import random
+import re
+import tempfile
+import time
+
+import pandas as pd
+
+from MetricsCore import GRAPHS, MarketplaceData, graph_ids as registered_graphs, select_graphs
+
+
+def split_partitions(df, key):
+    """Split `df` by `key` (column name or list of names) using the group index"""
+    partitions = {}
+    for name, positions in df.groupby(key, sort=True).indices.items():
+        label = ' - '.join(map(str, name)) if isinstance(name, tuple) else str(name)
+        partitions[label] = df.take(positions).reset_index(drop=True)
+    return partitions
+
+
+def _safe_name(label):
+    return re.sub(r'[^\w\-]+', '_', label).strip('_') or 'partition'
+
+
+def _directory_names(labels):
+    """{label: output directory name}, unique even when labels clean up to the same name"""
+    names, used = {}, set()
+    for label in sorted(labels):
+        base = name = _safe_name(label)
+        suffix = 2
+        while name.lower() in used:  # Case-insensitive file systems (Windows, macOS) fold case
+            name = f"{base}_{suffix}"
+            suffix += 1
+        used.add(name.lower())
+        names[label] = name
+    return names
+
+
+def _next_task(worker_id, queues, remaining, last_victim):
+    """Own queue first, then the last victim, then the others in random order
+
+    Returns (task, victim); victim is None for an own task and (None, None)
+    once every task is claimed.
+    """
+    others = [i for i in range(len(queues)) if i != worker_id and i != last_victim]
+    while True:
+        with remaining.get_lock():
+            if remaining.value == 0:
+                return None, None
+        try:
+            task, victim = queues[worker_id].get(timeout=0.05), None
+        except queue.Empty:
+            task = None
+            random.shuffle(others)
+            for victim in ([last_victim] if last_victim is not None else []) + others:
+                try:
+                    task = queues[victim].get_nowait()
+                    break
+                except queue.Empty:
+                    continue
+            if task is None:
+                continue
+        with remaining.get_lock():
+            remaining.value -= 1
+        return task, victim
+
+
+def _worker(worker_id, queues, remaining, results, spills, output_dir, fmt, dpi, cache_dir):
+    import matplotlib
+    matplotlib.use('Agg')
+    from FigureManager import release_figure
+    from RenderCache import RenderCache
+
+    cache = RenderCache(cache_dir) if cache_dir else None
+    current, visualizers, last_victim = None, {}, None  # Only the partition being drawn keeps its aggregates
+    while True:
+        task, victim = _next_task(worker_id, queues, remaining, last_victim)
+        if task is None:
+            return
+        last_victim = victim if victim is not None else last_victim
+        label, graph_ids = task
+        results.put(('claimed', worker_id, label, graph_ids, victim is not None))  # Lets the parent report a crash
+        for graph_id in graph_ids:
+            record = {'partition': label, 'graph': graph_id, 'worker': worker_id, 'stolen': victim is not None,
+                      'rows': spills[label]['rows'], 'path': None}
+            start = time.perf_counter()
+            try:
+                if label != current:
+                    current, visualizers = label, {}
+                    data = MarketplaceData(pd.read_pickle(spills[label]['path']))  # Validated by the parent
+                module = GRAPHS[graph_id].module
+                if module not in visualizers:
+                    visualizers[module] = importlib.import_module(module).MarketplaceVisualizer.from_data(data)
+                viz = visualizers[module]
+                target_dir = os.path.join(output_dir, spills[label]['directory'])
+                os.makedirs(target_dir, exist_ok=True)
+                path = os.path.join(target_dir, f"{graph_id}.{fmt}")
+                if cache is not None:
+                    hit = cache.render(viz, graph_id, path, dpi, fmt)
+                    record['status'] = 'skipped' if hit is None else ('cached' if hit else 'ok')
+                else:
+                    fig = viz.render_graph(graph_id)
+                    if fig is None:
+                        record['status'] = 'skipped'
+                    else:
+                        fig.savefig(path, dpi=dpi, bbox_inches='tight')
+                        release_figure(fig)
+                        record['status'] = 'ok'
+                if record['status'] != 'skipped':
+                    record['path'] = path
+            except Exception as exc:  # One bad slice must not take the batch down
+                current = None  # Reload next time; the failure may have been the load itself
+                record['status'] = 'error'
+                record['error'] = f"{type(exc).__name__}: {exc}"
+            record['seconds'] = round(time.perf_counter() - start, 4)
+            results.put(record)
+
+
+def _collect(results, processes, expected, poll=0.5):
+    """(records, claims) from `results` until `expected` records arrive or every worker has exited
+
+    Polls instead of blocking, so a worker that dies outside its per-task try
+    block (an import, OOM kill) cannot hang the parent.  claims maps
+    (partition, graph) to (worker, stolen) for the tasks a worker took.
+    """
+    records, claims = [], {}
+    while len(records) < expected:
+        try:
+            message = results.get(timeout=poll)
+        except queue.Empty:
+            if any(process.exitcode is None for process in processes):
+                continue
+            try:  # Everyone has exited: whatever they flushed is already in the pipe
+                message = results.get(timeout=poll)
+            except queue.Empty:
+                break
+        if isinstance(message, tuple):
+            _, worker_id, label, chunk, stolen = message
+            claims.update({(label, graph_id): (worker_id, stolen) for graph_id in chunk})
+        else:
+            records.append(message)
+    return records, claims
+
+
+def _lost_records(records, claims, processes, order, graph_ids, spills):
+    """Error records for every task no worker reported, blamed on the worker that claimed it"""
+    done = {(record['partition'], record['graph']) for record in records}
+    exits = [process.exitcode for process in processes]
+    lost = []
+    for label in order:
+        for graph_id in graph_ids:
+            if (label, graph_id) in done:
+                continue
+            worker_id, stolen = claims.get((label, graph_id), (None, False))
+            error = (f"worker {worker_id} exited with code {exits[worker_id]}" if worker_id is not None else
+                     f"not run: workers exited with codes {sorted(set(exits))}")
+            lost.append({'partition': label, 'graph': graph_id, 'worker': worker_id, 'stolen': stolen,
+                         'rows': spills[label]['rows'], 'path': None, 'status': 'error', 'error': error,
+                         'seconds': None})
+    return lost
+
+
+def run_batch(df, partition_key, output_dir, graph_ids=None, workers=None, fmt='png', dpi=300, cache_dir=None):
+    """Render `graph_ids` for every partition of `df`; writes and returns the manifest
+
+    `graph_ids` are ids or globs as in VisCLI (default: the DaaVis2 suite); a
+    pattern matching no graph raises ValueError before any worker starts.  With
+    `cache_dir`, unchanged figures are copied from the RenderCache instead of re-rendered.
+    """
+    graph_ids = select_graphs(graph_ids) if graph_ids else registered_graphs('DaaVis2')
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+
+    data = MarketplaceData.from_frame(df)  # Validated and derived once, not per worker
+    partitions = split_partitions(data.df, partition_key)
+    order = sorted(partitions, key=lambda label: len(partitions[label]), reverse=True)
+    directories = _directory_names(partitions)
+    half = (len(graph_ids) + 1) // 2
+    chunks = [chunk for chunk in (graph_ids[:half], graph_ids[half:]) if chunk]
+
+    ctx = mp.get_context()
+    queues = [ctx.Queue() for _ in range(workers)]
+    load = [0] * workers
+    with tempfile.TemporaryDirectory(prefix='region_batch_') as spill_dir:
+        spills = {}
+        for index, label in enumerate(order):
+            spills[label] = {'path': os.path.join(spill_dir, f"{index}.pkl"), 'directory': directories[label],
+                             'rows': len(partitions[label])}
+            partitions[label].to_pickle(spills[label]['path'])
+            owner = load.index(min(load))  # Longest-processing-time first: whole partition to the least-loaded queue
+            load[owner] += len(partitions[label]) + 1
+            for chunk in chunks:
+                queues[owner].put((label, chunk))
+        remaining = ctx.Value('i', len(order) * len(chunks))
+        results = ctx.Queue()
+
+        processes = [ctx.Process(target=_worker,
+                                 args=(i, queues, remaining, results, spills, output_dir, fmt, dpi, cache_dir))
+                     for i in range(workers)]
+        os.makedirs(output_dir, exist_ok=True)
+        for process in processes:
+            process.start()
+        records, claims = _collect(results, processes, len(order) * len(graph_ids))
+        for process in processes:
+            process.join()
+        records += _lost_records(records, claims, processes, order, graph_ids, spills)
+
+    records.sort(key=lambda r: (order.index(r['partition']), graph_ids.index(r['graph'])))
+    manifest = {
+        'partition_key': partition_key,
+        'partitions': len(order),
+        'graphs': graph_ids,
+        'workers': workers,
+        'wall_seconds': round(time.perf_counter() - started, 4),
+        'rows_quarantined': data.validation_report['rows_quarantined'],
+        'stolen_tasks': sum(r['stolen'] for r in records),
+        'cached_tasks': sum(r['status'] == 'cached' for r in records),
+        'tasks': records,
+    }
+    with open(os.path.join(output_dir, 'manifest.json'), 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2)
+
+    failed = sum(r['status'] == 'error' for r in records)
+    print(f"✅ {len(records) - failed}/{len(records)} tasks across {len(order)} partitions "
+          f"in {manifest['wall_seconds']:.1f}s ({manifest['stolen_tasks']} stolen)")
+    return manifest
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render the DaaVis2 suite once per region or store group")
+    parser.add_argument('csv_file_path')
+    parser.add_argument('--partition-key', nargs='+', default=['Store Location'],
+                        help="Column(s) to split on, e.g. 'Store Location' or 'Store Name'")
+    parser.add_argument('--graphs', nargs='+', help="Graph ids or globs, e.g. 2a '4*' (default: the DaaVis2 suite)")
+    parser.add_argument('--output-dir', default='region_output')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--cache-dir', help="Reuse unchanged renders from this RenderCache directory")
+    args = parser.parse_args()
+    try:
+        select_graphs(args.graphs)
+    except ValueError as error:
+        parser.error(str(error))
+
+    key = args.partition_key[0] if len(args.partition_key) == 1 else args.partition_key
+    frame = pd.read_csv(args.csv_file_path)
+    frame.columns = frame.columns.str.strip()
+    run_batch(frame, key, args.output_dir, args.graphs, args.workers, cache_dir=args.cache_dir)
@@ -0,0 +1,139 @@
+# Content-Addressed Render Cache - skip figures whose inputs did not change
+# File: RenderCache.py
+#
+# A render is keyed by
+#     sha256(graph id, style parameters, source of the graph method,
+#            sources of the shared plotting helpers, matplotlib / seaborn versions,
+#            aggregate table)
+# so the same slice of data drawn the same way always maps to the same file,
+# and editing a helper such as BarLabels or upgrading a plotting library
+# invalidates every entry it could have changed.
+# When that file already exists the figure is not built at all; the cached
+# image is copied to the requested path.  Entries are evicted least-recently-
+# used first (file mtime is bumped on every hit) once the cache exceeds its
+# size cap.  Everything lives on disk, so several worker processes can share
+# one cache directory.
+
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+from MetricsCore import GRAPHS
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Modules whose code shapes every figure besides the graph method itself
+RENDER_MODULES = ['VisualizerBase', 'FigureManager', 'BarLabels']
+RENDER_LIBRARIES = ['matplotlib', 'seaborn']
+
+
+def table_digest(table):
+    """Stable digest of a DataFrame's values, index, column names and dtypes"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(c) for c in table.columns]).encode())
+    digest.update(json.dumps([str(t) for t in table.dtypes]).encode())
+    digest.update(pd.util.hash_pandas_object(table, index=True).values.tobytes())
+    if not isinstance(table.columns, pd.RangeIndex):
+        digest.update(pd.util.hash_pandas_object(table.columns.to_series(), index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+class RenderCache:
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._method_digests = {}
+        self._environment_digest = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _method_digest(self, method):
+        """Hash of the plotting code, so editing a graph invalidates its entries"""
+        name = method.__qualname__
+        if name not in self._method_digests:
+            self._method_digests[name] = hashlib.sha256(inspect.getsource(method).encode()).hexdigest()
+        return self._method_digests[name]
+
+    def _environment(self):
+        """Hash of the shared plotting helpers' source and the plotting library versions"""
+        if self._environment_digest is None:
+            digest = hashlib.sha256()
+            for name in RENDER_MODULES:
+                digest.update(inspect.getsource(importlib.import_module(name)).encode())
+            for name in RENDER_LIBRARIES:
+                digest.update(f"{name}=={importlib.import_module(name).__version__}".encode())
+            self._environment_digest = digest.hexdigest()
+        return self._environment_digest
+
+    def key(self, viz, graph_id, table, style):
+        method = getattr(type(viz), GRAPHS[graph_id].method)
+        parts = [graph_id, json.dumps(style, sort_keys=True), self._method_digest(method), self._environment(),
+                 table_digest(table)]
+        return hashlib.sha256('\0'.join(parts).encode()).hexdigest()
+
+    def render(self, viz, graph_id, save_path, dpi=300, fmt=None):
+        """Write graph `graph_id` to `save_path`, reusing a cached render when possible
+
+        Returns True on a cache hit, False when the figure had to be rendered
+        and None when the graph had nothing to draw.
+        """
+        fmt = fmt or os.path.splitext(save_path)[1].lstrip('.') or 'png'
+        style = {'dpi': dpi, 'format': fmt, 'bbox_inches': 'tight',
+                 'approximate': getattr(viz, 'approximate', False)}
+        table = viz.graph_table(graph_id)
+        entry = os.path.join(self.directory, f"{self.key(viz, graph_id, table, style)}.{fmt}")
+
+        try:
+            os.utime(entry)  # Mark as recently used
+            shutil.copyfile(entry, save_path)
+            self.hits += 1
+            return True
+        except FileNotFoundError:  # Never cached, or evicted by another process just now
+            pass
+
+        from FigureManager import release_figure
+
+        fig = viz.render_graph(graph_id)
+        if fig is None:
+            return None
+        tmp_path = None
+        try:
+            handle, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=f'.{fmt}.tmp')
+            os.close(handle)
+            fig.savefig(tmp_path, format=fmt, dpi=dpi, bbox_inches='tight')
+            shutil.copyfile(tmp_path, save_path)  # Before publishing: the entry may be evicted at any time after
+            os.replace(tmp_path, entry)  # Atomic publish; concurrent writers produce identical bytes
+        finally:
+            release_figure(fig)
+            if tmp_path is not None and os.path.exists(tmp_path):  # evict() never sees *.tmp: clean up here
+                os.remove(tmp_path)
+        self.misses += 1
+        self.evict()
+        return False
+
+    def evict(self):
+        """Drop least-recently-used entries until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as scan:
+            for item in scan:
+                if item.is_file() and not item.name.endswith('.tmp'):
+                    stat = item.stat()
+                    entries.append((stat.st_mtime, stat.st_size, item.path))
+                    total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:  # Another process evicted it first
+                pass
+            total -= size
@@ -0,0 +1,133 @@
+# Async Render Pipeline - overlap loading, aggregation and figure rendering
+# File: RenderPipeline.py
+#
+# Three stages run concurrently instead of back to back:
+#   1. load      - the next dataset is read in a helper thread while the current one renders
+#   2. aggregate - the same thread validates it and computes only the tables the
+#                  requested graphs need (MetricsCore memoizes shared ones)
+#   3. render    - each graph is built and encoded (savefig at 300 dpi) in a worker
+#                  process that receives just its aggregate tables, exactly like
+#                  MetricsCore.render_graphs.  Figure building is mostly Python and
+#                  holds the GIL, so threads could not overlap it with encoding;
+#                  separate processes can, one graph per core.
+# A semaphore bounds how many graphs are queued or rendering at once, and the
+# loader prefetches a single dataset, so memory stays flat no matter how many
+# datasets are queued.
+
+import asyncio
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from MetricsCore import GRAPHS, MarketplaceData, _render_task, graph_ids as registered_graphs
+
+
+def _load(source):
+    """Read one dataset; `source` is a CSV path, a DataFrame or a zero-arg callable"""
+    if isinstance(source, pd.DataFrame):
+        return source
+    if callable(source):
+        return source()
+    return pd.read_csv(source)
+
+
+def _prepare(source, needs):
+    """Loader-thread body: one dataset's aggregate tables and MarketplaceData options"""
+    data = MarketplaceData.from_frame(_load(source))
+    return data.aggregates(needs), data.options()
+
+
+async def _produce(datasets, needs, queue, loop, loader):
+    try:
+        for name, source in datasets:
+            tables, options = await loop.run_in_executor(loader, _prepare, source, needs)
+            await queue.put((name, tables, options))
+    finally:
+        await queue.put(None)  # Always release the consumer; a loading error surfaces when it awaits us
+
+
+async def run_pipeline(datasets, output_dir, graph_ids=None, max_in_flight=None,
+                       executor=None, fmt='png', dpi=300, workers=None):
+    """Render `graph_ids` (default: the 15 DaaVis2 graphs) for every (name, source) in `datasets`
+
+    Outputs go to <output_dir>/<name>/<graph_id>.<fmt>.  Graphs are rendered
+    by `executor` (default: a pool of `workers` processes, one per core).
+    Returns one record per saved figure with its render time.
+    """
+    graph_ids = list(graph_ids or registered_graphs('DaaVis2'))
+    needs = list(dict.fromkeys(need for graph_id in graph_ids for need in GRAPHS[graph_id].needs))
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers  # Keep every worker fed without piling up tables
+    loop = asyncio.get_running_loop()
+    own_executor = executor is None
+    if own_executor:
+        # Spawned, not forked: the loader thread may hold pandas locks at fork time
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn'))
+    loader = ThreadPoolExecutor(max_workers=1)
+
+    queue = asyncio.Queue(maxsize=1)  # Prefetch exactly one dataset ahead
+    slots = asyncio.Semaphore(max_in_flight)
+    pending = []
+    records = []
+
+    async def render(name, spec, tables, options, path):
+        try:
+            result = await loop.run_in_executor(executor, _render_task, spec, tables, options, path, dpi)
+            if result['status'] == 'ok':
+                records.append({'dataset': name, 'graph': spec.id, 'path': path, 'seconds': result['seconds']})
+        finally:
+            slots.release()
+
+    producer = asyncio.create_task(_produce(datasets, needs, queue, loop, loader))
+    try:
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            name, tables, options = item
+            target_dir = os.path.join(output_dir, str(name))
+            os.makedirs(target_dir, exist_ok=True)
+
+            for graph_id in graph_ids:
+                await slots.acquire()
+                spec = GRAPHS[graph_id]
+                path = os.path.join(target_dir, f"{graph_id}.{fmt}")
+                graph_tables = {need: tables[need] for need in spec.needs}
+                pending.append(asyncio.create_task(render(name, spec, graph_tables, options, path)))
+
+        await asyncio.gather(*pending)
+        await producer  # Re-raises a dataset that failed to load or validate
+    finally:
+        if not producer.done():
+            producer.cancel()
+        loader.shutdown(wait=True)
+        if own_executor:
+            executor.shutdown(wait=True)
+    return records
+
+
+def render_datasets(datasets, output_dir, graph_ids=None, max_in_flight=None, executor=None, fmt='png', dpi=300,
+                    workers=None):
+    """Blocking wrapper around run_pipeline for scripts"""
+    return asyncio.run(run_pipeline(datasets, output_dir, graph_ids, max_in_flight, executor, fmt, dpi, workers))
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(description="Render the graph suite for many datasets concurrently")
+    parser.add_argument('pattern', help="Glob of per-region CSV files, e.g. 'regions/*.csv'")
+    parser.add_argument('--output-dir', default='pipeline_output')
+    parser.add_argument('--workers', type=int, help="Rendering processes (default: one per core)")
+    parser.add_argument('--max-in-flight', type=int, help="Graphs queued or rendering at once (default: 2 per worker)")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(args.pattern))
+    jobs = [(os.path.splitext(os.path.basename(path))[0], path) for path in paths]
+    started = time.perf_counter()
+    results = render_datasets(jobs, args.output_dir, max_in_flight=args.max_in_flight, workers=args.workers)
+    print(f"✅ Rendered {len(results)} figures from {len(jobs)} datasets in {time.perf_counter() - started:.1f}s")
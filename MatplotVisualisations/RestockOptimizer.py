@@ -0,0 +1,146 @@
+# Restock Optimizer - turn the supply/demand gap into store-to-store transfers
+# File: RestockOptimizer.py
+#
+# Graphs 1B/1C only list the worst under- and over-stocked rows.  This module
+# pairs them up: every (product, store, location) below the understock ratio
+# needs units to reach the target ratio, every row above the overstock ratio
+# can give units down to the keep ratio, and units only move within a product.
+#
+# Within a product the covered demand can never exceed min(surplus, deficit),
+# so a greedy fill that reaches that bound is optimal.  The fill is done for all
+# products at once with interval arithmetic: donors and receivers are laid out
+# as consecutive intervals on one global axis (each product owning a block the
+# size of what it can cover), and every boundary-to-boundary segment becomes a
+# transfer from the donor interval to the receiver interval it lies in.  It is
+# a sort plus a searchsorted, no Python loop per product or per store.
+
+import numpy as np
+import pandas as pd
+
+KEYS = ['Product Name', 'Store Name', 'Store Location']
+
+
+def _layout(frame, amount, block_start, block_size, sort_columns, ascending):
+    """Place each row's `amount` on the global axis inside its product block"""
+    frame = frame.assign(_amount=amount).sort_values(['Product Name'] + sort_columns,
+                                                      ascending=[True] + ascending, kind='stable')
+    within = frame.groupby('Product Name', sort=False)['_amount'].cumsum().to_numpy()
+    base = frame['Product Name'].map(block_start).to_numpy()
+    size = frame['Product Name'].map(block_size).to_numpy()
+    end = base + np.minimum(within, size)
+    start = base + np.minimum(within - frame['_amount'].to_numpy(), size)
+    keep = end > start
+    return frame[keep].reset_index(drop=True), start[keep], end[keep]
+
+
+def recommend_transfers(df, understock=0.8, overstock=1.5, target=1.0, keep=1.0):
+    """Transfer table that maximizes covered demand per product
+
+    Receivers (ratio < understock) are filled up to `target` x Demand, most
+    urgent first.  Donors (ratio > overstock) give down to `keep` x Demand,
+    largest surplus first.
+    """
+    items = df.groupby(KEYS, as_index=False)[['Quantity', 'Demand']].sum()
+    ratio = items['Quantity'] / items['Demand'].where(items['Demand'] > 0)
+    items['Supply_Demand_Ratio'] = ratio.fillna(np.inf)
+
+    receivers = items[items['Supply_Demand_Ratio'] < understock].copy()
+    receivers['Need'] = np.ceil(target * receivers['Demand'] - receivers['Quantity']).clip(lower=0)
+    donors = items[items['Supply_Demand_Ratio'] > overstock].copy()
+    donors['Surplus'] = np.floor(donors['Quantity'] - keep * donors['Demand']).clip(lower=0)
+
+    need = receivers.groupby('Product Name')['Need'].sum()
+    surplus = donors.groupby('Product Name')['Surplus'].sum()
+    covered = pd.concat([need, surplus], axis=1, join='inner').min(axis=1)
+    covered = covered[covered > 0]
+    empty = pd.DataFrame(columns=['Product Name', 'From Store', 'From Location',
+                                  'To Store', 'To Location', 'Units'])
+    if covered.empty:
+        return empty
+    block_start = covered.cumsum() - covered
+
+    giving, give_start, give_end = _layout(donors, donors['Surplus'], block_start, covered,
+                                           ['Surplus'], [False])
+    taking, take_start, take_end = _layout(receivers, receivers['Need'], block_start, covered,
+                                           ['Supply_Demand_Ratio'], [True])
+
+    # Every boundary splits the axis into segments owned by exactly one donor and one receiver
+    bounds = np.union1d(np.concatenate([give_start, give_end]), np.concatenate([take_start, take_end]))
+    seg_start, seg_end = bounds[:-1], bounds[1:]
+    donor = np.searchsorted(give_end, seg_start, side='right')
+    receiver = np.searchsorted(take_end, seg_start, side='right')
+    valid = (donor < len(giving)) & (receiver < len(taking))
+    donor, receiver, units = donor[valid], receiver[valid], (seg_end - seg_start)[valid]
+
+    transfers = pd.DataFrame({
+        'Product Name': giving['Product Name'].to_numpy()[donor],
+        'From Store': giving['Store Name'].to_numpy()[donor],
+        'From Location': giving['Store Location'].to_numpy()[donor],
+        'To Store': taking['Store Name'].to_numpy()[receiver],
+        'To Location': taking['Store Location'].to_numpy()[receiver],
+        'Units': units.astype(np.int64),
+    })
+    # Zero-length intervals were dropped, so each (donor, receiver) pair is exactly one segment
+    return transfers[transfers['Units'] > 0].reset_index(drop=True)
+
+
+def coverage_summary(df, transfers, understock=0.8, target=1.0):
+    """How much of the understocked rows' shortfall the transfers cover"""
+    items = df.groupby(KEYS, as_index=False)[['Quantity', 'Demand']].sum()
+    short = items[items['Quantity'] < understock * items['Demand']]
+    shortfall = float(np.ceil(target * short['Demand'] - short['Quantity']).clip(lower=0).sum())
+    moved = float(transfers['Units'].sum()) if len(transfers) else 0.0
+    return {
+        'understocked_items': int(len(short)),
+        'shortfall_units': shortfall,
+        'transferred_units': moved,
+        'coverage': moved / shortfall if shortfall else 1.0,
+        'transfers': int(len(transfers)),
+    }
+
+
+def plot_transfers(transfers, save_path=None, top=15):
+    """Horizontal bar chart of the largest recommended transfers"""
+    import matplotlib.pyplot as plt
+    from FigureManager import new_figure, release_figure
+
+    if len(transfers) == 0:
+        print("No transfers recommended!")
+        return None
+    largest = transfers.nlargest(top, 'Units').iloc[::-1]
+    labels = (largest['Product Name'].str[:15] + '\n' + largest['From Store'].str[:12]
+              + ' → ' + largest['To Store'].str[:12])
+
+    fig = new_figure(figsize=(14, 8))
+    plt.barh(labels, largest['Units'], color='#2ecc71', alpha=0.8, edgecolor='darkgreen')
+    plt.xlabel('Units to Transfer', fontsize=14, fontweight='bold')
+    plt.title('🔁 Recommended Stock Transfers\n(Overstocked → Understocked, same product)',
+              fontsize=16, fontweight='bold', pad=20)
+    plt.grid(axis='x', alpha=0.3)
+    plt.tight_layout()
+
+    if save_path:
+        fig.savefig(save_path, dpi=300, bbox_inches='tight')
+    plt.show()
+    release_figure(fig)
+    return fig
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Recommend stock transfers between stores")
+    parser.add_argument('csv_file_path')
+    parser.add_argument('--output', default='restock_transfers.csv')
+    parser.add_argument('--chart', help="Also save a chart of the largest transfers")
+    args = parser.parse_args()
+
+    frame = pd.read_csv(args.csv_file_path)
+    frame.columns = frame.columns.str.strip()
+    plan = recommend_transfers(frame)
+    plan.to_csv(args.output, index=False)
+    print(f"✅ {coverage_summary(frame, plan)}")
+    if args.chart:
+        import matplotlib
+        matplotlib.use('Agg')
+        plot_transfers(plan, args.chart)
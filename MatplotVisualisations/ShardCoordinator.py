@@ -0,0 +1,349 @@
+# Sharded Batch Execution - partial aggregates per store shard, merged once, rendered once
+# File: ShardCoordinator.py
+#
+# The coordinator splits the raw product rows into N shards by a stable hash of
+# Store Name and hands each shard to a worker process (a stand-in for a node).
+# Every worker validates and derives its own rows - duplicate keys always share
+# a store, so per-shard validation quarantines exactly the rows a single node
+# would - and returns small mergeable partials:
+#   * per-grain sums and row counts (location, store, category, product, ...)
+#   * Supply_Demand_Ratio means per (product, store), which never span shards
+#   * top-k understocked / overstocked candidates (ties included)
+#   * understocked / overstocked counts per (store, location, category) and the
+#     Insights.ALERT_ROWS most understocked rows of each store, each location and
+#     each category, from which the coordinator rebuilds a summarised
+#     stock_alerts (see Insights)
+#   * exact distinct products, or HyperLogLog sketches with --approximate
+#   * the plotted rows themselves, only when graph 1A / V1 is requested
+# The coordinator merges those into the root MetricsCore aggregates, seeds a
+# frame-less MarketplaceData with them and renders the selected graphs once.
+# Sums and counts match a single-node run exactly; means are sum / count.
+# Each worker writes its own quarantined rows (with their _Row_Id, the row's
+# position in the source) to <stem>.shard<N>.quarantine.csv when a quarantine
+# path is given; without one they are discarded, as in a single-node run.
+
+import contextlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from Insights import ALERT_ROWS, INSIGHTS
+from MetricsCore import AGGREGATES, GRAPHS, MarketplaceData, select_graphs
+from Sketches import HyperLogLog
+
+SHARD_KEY = 'Store Name'
+ROW_ID = '_Row_Id'
+TOP_K = 10
+MEASURES = ['Quantity', 'Demand', 'FootFall', 'Sales', 'Rows']
+ROW_COLUMNS = ['Store Name', 'Store Location', 'Product Name', 'Product Category', 'Demand', 'Quantity',
+               'FootFall', 'Supply_Demand_Ratio']
+ALERT_GRAIN = ['Store Name', 'Store Location', 'Product Category']
+ALERT_COUNTS = ['Understocked', 'Overstocked']
+
+# Grain -> group keys; each grain's partial holds the MEASURES sums per group
+GRAINS = {
+    'location': ['Store Location'],
+    'store': ['Store Name'],
+    'store_location': ['Store Name', 'Store Location'],
+    'category': ['Product Category'],
+    'product': ['Product Name'],
+    'product_location': ['Product Name', 'Store Location'],
+    'product_store': ['Product Name', 'Store Name'],
+}
+
+
+# =============================================================================
+# SHARDING
+# =============================================================================
+
+def shard_frame(df, shards, key=SHARD_KEY):
+    """Split raw rows into `shards` frames by a process-independent hash of `key`
+
+    Each row keeps its position in `df` as _Row_Id so row-level results can be
+    put back in single-node order.
+    """
+    df = df.assign(**{ROW_ID: np.arange(len(df))})
+    hashes = pd.util.hash_pandas_object(df[key].astype(str), index=False).to_numpy()
+    shard_ids = hashes % np.uint64(shards)
+    return [df[shard_ids == shard] for shard in range(shards)]
+
+
+# =============================================================================
+# WORKER: PARTIAL AGGREGATES
+# =============================================================================
+
+def _item_candidates(rows, mask, ascending, top_k):
+    candidates = rows[mask]
+    limit = candidates['Supply_Demand_Ratio'].nsmallest(top_k, keep='all') if ascending else \
+        candidates['Supply_Demand_Ratio'].nlargest(top_k, keep='all')
+    return candidates.loc[limit.index]
+
+
+def partial_aggregates(shard, sales_column='Estimated_Sales', approximate=False, with_rows=False, top_k=TOP_K,
+                       quarantine_path=None):
+    """Validate one raw shard and reduce it to mergeable partials (runs in a worker process)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        data = MarketplaceData.from_frame(shard, quarantine_path)
+    df = data.df.assign(Sales=data.df[sales_column], Rows=1)
+
+    partial = {grain: df.groupby(keys, sort=False)[MEASURES].sum() for grain, keys in GRAINS.items()}
+    partial['ratio_mean'] = df.groupby(['Product Name', 'Store Name'], sort=False)['Supply_Demand_Ratio'].mean()
+
+    rows = df[ROW_COLUMNS + [ROW_ID]]
+    partial['understocked'] = _item_candidates(rows, rows['Supply_Demand_Ratio'] < 0.8, True, top_k)
+    partial['overstocked'] = _item_candidates(rows, rows['Supply_Demand_Ratio'] > 1.5, False, top_k)
+    alerts = data.aggregate('stock_alerts')
+    partial['alert_counts'] = alerts.groupby(ALERT_GRAIN, sort=False)[ALERT_COUNTS].sum()
+    understocked = alerts[alerts['Understocked'] == 1].sort_values('Supply_Demand_Ratio', kind='stable')
+    # A global top-k per store, location or category is inside some shard's top-k of it; ties keep row order
+    keep = np.zeros(len(understocked), dtype=bool)
+    for column in ALERT_GRAIN:
+        keep |= (understocked.groupby(column, sort=False).cumcount() < ALERT_ROWS).to_numpy()
+    lowest = understocked[keep]
+    partial['alert_rows'] = lowest.assign(**{ROW_ID: data.df.loc[lowest.index, ROW_ID]})
+    if with_rows:
+        partial['rows'] = rows
+
+    if approximate:
+        partial['stores_hll'] = HyperLogLog.from_values(df[['Store Name', 'Store Location']])
+        partial['products_hll'] = HyperLogLog.from_values(df['Product Name'])
+    else:
+        partial['store_count'] = len(df[['Store Name', 'Store Location']].drop_duplicates())  # Store-local
+        partial['products'] = df['Product Name'].unique()
+    partial['validation'] = {key: value for key, value in data.validation_report.items() if key != 'quarantined'}
+    return partial
+
+
+# =============================================================================
+# COORDINATOR: MERGE
+# =============================================================================
+
+def _merge_grain(partials, grain):
+    merged = pd.concat([partial[grain] for partial in partials]).groupby(GRAINS[grain]).sum()
+    merged = merged.reset_index()
+    merged['FootFall_Mean'] = merged['FootFall'] / merged['Rows']
+    return merged
+
+
+def _metrics(grain, keys):
+    """Quantity / Demand sums and FootFall mean in the column layout MetricsCore produces"""
+    return grain[keys + ['Quantity', 'Demand', 'FootFall_Mean']].rename(columns={'FootFall_Mean': 'FootFall'})
+
+
+def _top_items(partials, part, ascending):
+    candidates = pd.concat([partial[part] for partial in partials])
+    # Value order, ties in single-node row order - what nsmallest/nlargest(keep='first') returns
+    candidates = candidates.sort_values(ROW_ID, kind='stable')
+    candidates = candidates.sort_values('Supply_Demand_Ratio', ascending=ascending, kind='stable').head(TOP_K)
+    candidates = candidates.reset_index(drop=True)
+    candidates['Item_Label'] = (candidates['Product Name'].str[:15] + '\n' + candidates['Store Name'].str[:12] +
+                                '\n' + candidates['Store Location'])
+    return candidates[['Item_Label', 'Supply_Demand_Ratio']]
+
+
+def _stock_alerts(partials):
+    """Summarised stock_alerts: the kept rows in single-node order, then count rows for everything else"""
+    rows = pd.concat([partial['alert_rows'] for partial in partials]).sort_values(ROW_ID, kind='stable')
+    rows = rows.drop(columns=ROW_ID)
+    counts = pd.concat([partial['alert_counts'] for partial in partials]).groupby(ALERT_GRAIN).sum()
+    remainder = counts.sub(rows.groupby(ALERT_GRAIN)[ALERT_COUNTS].sum(), fill_value=0).astype(np.int64)
+    remainder = remainder[remainder.sum(axis=1) > 0].reset_index()
+    remainder['Product Name'] = np.nan  # Counted, not listed: matches no product filter
+    remainder['Supply_Demand_Ratio'] = np.nan
+    return pd.concat([rows, remainder[rows.columns]], ignore_index=True)
+
+
+def merge_partials(partials, approximate=False):
+    """Merge worker partials into the root MetricsCore aggregate tables"""
+    grains = {grain: _merge_grain(partials, grain) for grain in GRAINS}
+    tables = {}
+
+    location = grains['location']
+    tables['location_metrics'] = _metrics(location, ['Store Location']).sort_values('Demand', ascending=False)
+    tables['store_location_metrics'] = _metrics(grains['store_location'], ['Store Name', 'Store Location'])
+
+    store_metrics = _metrics(grains['store'], ['Store Name'])
+    store_metrics['Sales_Potential'] = store_metrics['Demand'] * store_metrics['FootFall'] / 100
+    tables['store_metrics'] = store_metrics
+    tables['store_demand'] = grains['store'][['Store Name', 'Demand']].sort_values('Demand', ascending=False)
+    tables['category_metrics'] = _metrics(grains['category'], ['Product Category'])
+
+    product = grains['product'][['Product Name', 'Demand', 'Quantity', 'FootFall_Mean']]
+    tables['product_metrics'] = product.rename(columns={'FootFall_Mean': 'FootFall'}).sort_values(
+        'Demand', ascending=True)
+
+    product_location = grains['product_location'][['Product Name', 'Store Location', 'Demand']]
+    tables['product_location_demand'] = product_location.pivot_table(
+        values='Demand', index='Product Name', columns='Store Location', aggfunc='sum').fillna(0)
+    best_locations = product_location.loc[
+        product_location.groupby('Product Name')['Demand'].idxmax()
+    ].reset_index(drop=True)
+    tables['best_locations'] = best_locations.sort_values('Demand', ascending=True)
+
+    tables['product_store_demand'] = grains['product_store'].pivot_table(
+        values='Demand', index='Product Name', columns='Store Name', aggfunc='sum').fillna(0)
+    ratio_mean = pd.concat([partial['ratio_mean'] for partial in partials]).rename('Supply_Demand_Ratio')
+    tables['ratio_heatmap'] = ratio_mean.reset_index().pivot_table(
+        values='Supply_Demand_Ratio', index='Product Name', columns='Store Name', aggfunc='mean').fillna(0)
+
+    for name, grain, keys in [('location_conversion', location, ['Store Location']),
+                              ('store_conversion', grains['store_location'], ['Store Name', 'Store Location'])]:
+        conversion = grain[keys + ['FootFall', 'Sales']].rename(columns={'Sales': 'Estimated_Sales'})
+        conversion['Conversion_Rate'] = (conversion['Estimated_Sales'] / conversion['FootFall']) * 100
+        tables[name] = conversion
+    tables['location_conversion'] = tables['location_conversion'].sort_values('Conversion_Rate', ascending=False)
+
+    if approximate:
+        stores, products = HyperLogLog(), HyperLogLog()
+        for partial in partials:
+            stores.merge(partial['stores_hll'])
+            products.merge(partial['products_hll'])
+        store_count, product_count = int(round(stores.estimate())), int(round(products.estimate()))
+    else:
+        store_count = sum(partial['store_count'] for partial in partials)
+        product_count = len(pd.unique(np.concatenate([partial['products'] for partial in partials])))
+    rows = location['Rows'].sum()
+    tables['marketplace_totals'] = pd.DataFrame({
+        'Metric': ['Total Inventory', 'Total Demand', 'Avg FootFall', 'Total Stores', 'Unique Products'],
+        'Value': [location['Quantity'].sum(), location['Demand'].sum(), location['FootFall'].sum() / rows,
+                  store_count, product_count]
+    })
+
+    tables['understocked_top'] = _top_items(partials, 'understocked', True)
+    tables['overstocked_top'] = _top_items(partials, 'overstocked', False)
+    tables['stock_alerts'] = _stock_alerts(partials)
+    if all('rows' in partial for partial in partials):
+        rows_table = pd.concat([partial['rows'] for partial in partials]).sort_values(ROW_ID)
+        tables['rows'] = rows_table.drop(columns=ROW_ID).reset_index(drop=True)
+    return tables
+
+
+def merge_validation(partials):
+    """Combined validation report of all shards; quarantine_path lists the shard files written"""
+    report = {'rows_in': 0, 'rows_clean': 0, 'rows_quarantined': 0, 'reasons': {}, 'quarantine_path': None}
+    paths = []
+    for partial in partials:
+        shard_report = partial['validation']
+        for key in ('rows_in', 'rows_clean', 'rows_quarantined'):
+            report[key] += shard_report[key]
+        for reason, count in shard_report['reasons'].items():
+            report['reasons'][reason] = report['reasons'].get(reason, 0) + count
+        if shard_report['quarantine_path']:
+            paths.append(shard_report['quarantine_path'])
+    report['quarantine_path'] = ', '.join(paths) or None
+    return report
+
+
+def shard_quarantine_path(quarantine_path, shard):
+    """Shard N's file for `quarantine_path`: data.quarantine.csv -> data.shard0.quarantine.csv
+
+    The shard number goes before '.quarantine' so the name still matches the
+    *.quarantine.csv ignore pattern.
+    """
+    stem, ext = os.path.splitext(quarantine_path)
+    stem, suffix = (stem[:-len('.quarantine')], '.quarantine') if stem.endswith('.quarantine') else (stem, '')
+    return f"{stem}.shard{shard}{suffix}{ext}"
+
+
+# =============================================================================
+# RUN
+# =============================================================================
+
+def run_sharded(df, shards=4, graph_ids=None, output_dir=None, approximate=False, fmt='png', dpi=300, jobs=1,
+                sales_column='Estimated_Sales', quarantine_path=None):
+    """Aggregate `df` across `shards` worker processes; render `graph_ids` if `output_dir` is given
+
+    With `quarantine_path`, shard N writes its rejected rows to
+    shard_quarantine_path(quarantine_path, N).  Returns (MarketplaceData
+    seeded with the merged aggregates, render results).
+    """
+    from MetricsCore import render_graphs
+    from DataValidation import print_report
+
+    graph_ids = select_graphs(graph_ids)
+    with_rows = any('rows' in GRAPHS[graph_id].needs for graph_id in graph_ids)
+    df = df.set_axis(df.columns.str.strip(), axis=1)  # Not in place: the frame is the caller's
+    parts = shard_frame(df, shards)
+    quarantine_paths = [shard_quarantine_path(quarantine_path, shard) if quarantine_path else None
+                        for shard in range(shards)]
+    with ProcessPoolExecutor(max_workers=shards) as pool:
+        partials = list(pool.map(partial_aggregates, parts, [sales_column] * shards, [approximate] * shards,
+                                 [with_rows] * shards, [TOP_K] * shards, quarantine_paths))
+
+    data = MarketplaceData.from_aggregates(merge_partials(partials, approximate), approximate, sales_column)
+    data.validation_report = merge_validation(partials)
+    print_report(data.validation_report)
+    print(f"✅ Merged {shards} shards: {data.validation_report['rows_clean']} records")
+
+    results = []
+    if output_dir:
+        results = render_graphs(data, graph_ids, output_dir, jobs, fmt, dpi)
+    return data, results
+
+
+def _alert_answers(alerts, frame, stores=50):
+    """supply_demand answers over `alerts`: unfiltered, per store (the first `stores`), location and category"""
+    compute = INSIGHTS['supply_demand'].compute
+    queries = [{}] + [{'store': store} for store in frame['Store Name'].unique()[:stores]]
+    queries += [{'location': location} for location in frame['Store Location'].unique()]
+    queries += [{'category': category} for category in frame['Product Category'].unique()]
+    return [compute(alerts, limit=ALERT_ROWS, **query) for query in queries]
+
+
+def verify(df, data):
+    """Compare merged tables with a single-node MarketplaceData over `df`; returns mismatching names"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        single = MarketplaceData.from_frame(df.copy())
+    single.approximate, single.sales_column = data.approximate, data.sales_column
+    mismatches = []
+    for name in AGGREGATES:
+        try:
+            merged = data.aggregate(name)
+        except KeyError:  # Not shipped, e.g. rows when 1A / V1 were not requested
+            continue
+        expected = single.aggregate(name)
+        if name == 'stock_alerts':  # Summarised when sharded: compare what supply_demand answers from it
+            if _alert_answers(merged, single.df) != _alert_answers(expected, single.df):
+                mismatches.append(name)
+            continue
+        if name in ('understocked_top', 'overstocked_top'):
+            expected = expected.reset_index(drop=True)
+        try:
+            pd.testing.assert_frame_equal(merged, expected, check_exact=False, rtol=1e-12)
+        except AssertionError:
+            mismatches.append(name)
+    return mismatches
+
+
+if __name__ == "__main__":
+    import argparse
+    from DataValidation import default_quarantine_path
+    from MetricsCore import DEFAULT_DATA_PATH
+
+    parser = argparse.ArgumentParser(description="Aggregate across store-hash shards in worker processes, render once")
+    parser.add_argument('csv_file_path', nargs='?', default=DEFAULT_DATA_PATH)
+    parser.add_argument('--shards', type=int, default=4)
+    parser.add_argument('--graphs', nargs='+', help="Graph ids or globs (default: all)")
+    parser.add_argument('--output-dir', default='sharded_output')
+    parser.add_argument('--format', default='png')
+    parser.add_argument('--dpi', type=int, default=300)
+    parser.add_argument('--jobs', type=int, default=1, help="Parallel plotting processes")
+    parser.add_argument('--approximate', action='store_true')
+    parser.add_argument('--verify', action='store_true', help="Also aggregate on one node and compare")
+    parser.add_argument('--synthetic', type=int, metavar='ROWS',
+                        help="Use PerfHarness.synthetic_frame(ROWS) instead of the CSV, e.g. --synthetic 3000 --verify")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from PerfHarness import synthetic_frame
+        frame, quarantine = synthetic_frame(args.synthetic), None
+    else:
+        frame, quarantine = pd.read_csv(args.csv_file_path), default_quarantine_path(args.csv_file_path)
+    merged_data, _ = run_sharded(frame, args.shards, args.graphs, args.output_dir, args.approximate,
+                                 args.format, args.dpi, args.jobs, quarantine_path=quarantine)
+    if args.verify:
+        different = verify(frame, merged_data)
+        print("✅ Matches single-node aggregates" if not different else f"❌ Differs from single node: {different}")
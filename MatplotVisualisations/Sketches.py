@@ -0,0 +1,199 @@
+# Mergeable Sketches - approximate distinct counts and quantiles
+# File: Sketches.py
+#
+# Exact distinct counts (drop_duplicates / unique) and exact medians need every
+# row in one place.  These sketches summarise a chunk in fixed memory and can
+# be merged across chunks, processes or shards in any order:
+#
+#   HyperLogLog  distinct counts   relative std. error ~ 1.04 / sqrt(2**precision)
+#                                  (precision 14 -> ~0.81%, 16 KiB of registers),
+#                                  across the whole range: Ertl's improved estimator
+#                                  replaces the linear-counting / raw switch, whose
+#                                  bias reached ~2.5% near 2.5 * 2**precision
+#   KLLSketch    quantiles/median  normalized rank error ~ 1.7% at k=200 (99% conf.),
+#                                  shrinking roughly as 1/k
+#
+# `distinct_count` and `quantile` take an `approximate` switch so callers can fall
+# back to the exact pandas computation with the same call.  `quantile` seeds its
+# KLLSketch with a fixed seed, so identical input gives identical output - render
+# cache keys and golden values stay valid in approximate mode.
+
+import numpy as np
+import pandas as pd
+
+
+def hash_values(values):
+    """Stable 64-bit hashes of a Series or DataFrame (rows), identical across processes"""
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+
+
+def _sigma(x):
+    """Ertl's sigma(x) = x + sum 2**(k-1) * x**(2**k), the zero-register correction"""
+    if x == 1:
+        return float('inf')
+    y, z = 1.0, x
+    while True:
+        x *= x
+        previous, z = z, z + x * y
+        y += y
+        if z == previous:
+            return z
+
+
+def _tau(x):
+    """Ertl's tau(x), the correction for registers at the maximum rank"""
+    if x == 0 or x == 1:
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = np.sqrt(x)
+        y *= 0.5
+        previous, z = z, z - (1 - x) ** 2 * y
+        if z == previous:
+            return z / 3
+
+
+def _bit_length(words):
+    """Exact bit length of uint64 values, vectorized"""
+    high = (words >> np.uint64(32)).astype(np.float64)
+    low = (words & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    high_bits = np.floor(np.log2(np.maximum(high, 1))) + 1
+    low_bits = np.floor(np.log2(np.maximum(low, 1))) + 1
+    return np.where(high > 0, 32 + high_bits, np.where(low > 0, low_bits, 0)).astype(np.int64)
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter with 2**precision one-byte registers"""
+
+    def __init__(self, precision=14):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @classmethod
+    def from_values(cls, values, precision=14):
+        sketch = cls(precision)
+        sketch.update(values)
+        return sketch
+
+    def update(self, values):
+        """Add a Series (or DataFrame, one item per row)"""
+        self.update_hashes(hash_values(values))
+        return self
+
+    def update_hashes(self, hashes):
+        if len(hashes) == 0:
+            return self
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        remainder = hashes << p
+        rank = np.minimum(64 - _bit_length(remainder) + 1, 64 - self.precision + 1)
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+        return self
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        """Ertl's improved estimator (arXiv:1702.01284): unbiased without empirical tables or range switches"""
+        m = len(self.registers)
+        q = 64 - self.precision  # Ranks run 0 .. q + 1
+        counts = np.bincount(self.registers, minlength=q + 2).astype(np.float64)
+        z = m * _tau(1 - counts[q + 1] / m)
+        for rank in range(q, 0, -1):
+            z = 0.5 * (z + counts[rank])
+        z += m * _sigma(counts[0] / m)
+        return float(m * m / (2 * np.log(2)) / z)
+
+    @property
+    def relative_error(self):
+        return 1.04 / np.sqrt(len(self.registers))
+
+
+class KLLSketch:
+    """KLL quantile sketch: level h holds items of weight 2**h, capacities shrink by 2/3 per level"""
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_values(cls, values, k=200, seed=None):
+        sketch = cls(k, seed)
+        sketch.update(values)
+        return sketch
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.count += len(values)
+        self._compress()
+        return self
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                paired = items[:len(items) - len(keep)]
+                promoted = paired[self._rng.integers(2)::2]  # Random half of each adjacent pair
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantile(self, q):
+        if self.count == 0:
+            return float('nan')
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items_), 2 ** level, dtype=np.float64)
+                                  for level, items_ in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        position = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        return float(items[order][min(position, len(items) - 1)])
+
+    def median(self):
+        return self.quantile(0.5)
+
+
+# =============================================================================
+# EXACT / APPROXIMATE SWITCHES
+# =============================================================================
+
+def distinct_count(values, approximate=False, precision=14):
+    """Distinct items in a Series, or distinct rows in a DataFrame"""
+    if approximate:
+        return int(round(HyperLogLog.from_values(values, precision).estimate()))
+    if isinstance(values, pd.DataFrame):
+        return len(values.drop_duplicates())
+    return len(values.unique())
+
+
+def quantile(values, q=0.5, approximate=False, k=200, seed=0):
+    if approximate:
+        return KLLSketch.from_values(values, k, seed).quantile(q)
+    return float(pd.Series(values).quantile(q))
@@ -0,0 +1,144 @@
+# Inventory Snapshot History - date-partitioned Parquet with rolling metrics
+# File: SnapshotStore.py
+#
+# Every visualizer run can append its frame as a snapshot:
+#     <root>/snapshot_date=2025-09-22/part-20250922T152015-<id>.parquet
+# Partitions are named by date, so a query for a window only lists directory
+# names and opens the partitions inside that window - the cost of a trend query
+# follows the window length, not the length of the history.  Without a Parquet
+# engine (pyarrow / fastparquet) parts are pickled instead (part-...-<id>.pkl);
+# reads accept both, so a history may mix the two.
+
+import datetime as dt
+import importlib.util
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+ITEM_KEYS = ['Store Name', 'Store Location', 'Product Name']
+STORE_KEYS = ['Store Name', 'Store Location']
+SNAPSHOT_COLUMNS = ITEM_KEYS + ['Product Category', 'Quantity', 'Demand', 'FootFall']
+BAND_LABELS = ['Understocked', 'Balanced', 'Overstocked']
+PARTITION_PREFIX = 'snapshot_date='
+PART_SUFFIXES = ('.parquet', '.pkl')
+
+
+def _has_parquet_engine():
+    return any(importlib.util.find_spec(engine) is not None for engine in ('pyarrow', 'fastparquet'))
+
+
+def _as_date(value):
+    if value is None or isinstance(value, dt.date) and not isinstance(value, dt.datetime):
+        return value
+    return pd.Timestamp(value).date()
+
+
+def stock_band(ratio):
+    """Same thresholds as the graphs: < 0.8 understocked, > 1.5 overstocked"""
+    bands = np.select([ratio < 0.8, ratio > 1.5], ['Understocked', 'Overstocked'], 'Balanced')
+    return pd.Categorical(bands, categories=BAND_LABELS)
+
+
+class SnapshotStore:
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    # ---- writes ------------------------------------------------------------
+
+    def append(self, df, snapshot_date=None):
+        """Write one snapshot of `df`; several runs on the same day become separate parts"""
+        now = dt.datetime.now()
+        snapshot_date = _as_date(snapshot_date) or now.date()
+        directory = os.path.join(self.root, f"{PARTITION_PREFIX}{snapshot_date.isoformat()}")
+        os.makedirs(directory, exist_ok=True)
+        name = f"part-{now:%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+        columns = [column for column in SNAPSHOT_COLUMNS if column in df.columns]
+        part = df[columns].reset_index(drop=True)
+        if _has_parquet_engine():
+            part.to_parquet(os.path.join(directory, f"{name}.parquet"), index=False)
+        else:
+            part.to_pickle(os.path.join(directory, f"{name}.pkl"))
+        return snapshot_date
+
+    # ---- reads -------------------------------------------------------------
+
+    def partitions(self, start=None, end=None):
+        """(date, directory) pairs inside [start, end], found from directory names alone"""
+        start, end = _as_date(start), _as_date(end)
+        found = []
+        for entry in os.listdir(self.root):
+            if not entry.startswith(PARTITION_PREFIX):
+                continue
+            day = dt.date.fromisoformat(entry[len(PARTITION_PREFIX):])
+            if (start is None or day >= start) and (end is None or day <= end):
+                found.append((day, os.path.join(self.root, entry)))
+        return sorted(found)
+
+    def read(self, start=None, end=None, columns=None, latest_per_day=True):
+        """Snapshots in the window with a Snapshot_Date column
+
+        By default only the last run of each day is read.
+        """
+        frames = []
+        for day, directory in self.partitions(start, end):
+            parts = sorted(name for name in os.listdir(directory) if name.endswith(PART_SUFFIXES))
+            if latest_per_day:
+                parts = parts[-1:]
+            for part in parts:
+                path = os.path.join(directory, part)
+                if part.endswith('.parquet'):
+                    frame = pd.read_parquet(path, columns=columns)
+                else:
+                    frame = pd.read_pickle(path)
+                    frame = frame[columns] if columns is not None else frame
+                frame['Snapshot_Date'] = pd.Timestamp(day)
+                frames.append(frame)
+        if not frames:
+            return pd.DataFrame(columns=(columns or SNAPSHOT_COLUMNS) + ['Snapshot_Date'])
+        return pd.concat(frames, ignore_index=True)
+
+    # ---- rolling / windowed metrics ---------------------------------------
+
+    def ratio_trend(self, start=None, end=None, window=7):
+        """Supply_Demand_Ratio per store/product per snapshot, with a rolling mean over `window` snapshots"""
+        history = self.read(start, end, columns=ITEM_KEYS + ['Quantity', 'Demand'])
+        history = history.groupby(ITEM_KEYS + ['Snapshot_Date'], as_index=False)[['Quantity', 'Demand']].sum()
+        history = history.sort_values(ITEM_KEYS + ['Snapshot_Date'], ignore_index=True)
+        history['Supply_Demand_Ratio'] = (history['Quantity'] / history['Demand']).replace([np.inf, -np.inf], np.nan)
+        return _with_rolling(history, ITEM_KEYS, 'Supply_Demand_Ratio', window)
+
+    def conversion_trend(self, start=None, end=None, window=7, keys=STORE_KEYS):
+        """Conversion rate (Estimated_Sales / FootFall %) per store per snapshot, with a rolling mean"""
+        history = self.read(start, end, columns=list(dict.fromkeys(keys + ['Quantity', 'Demand', 'FootFall'])))
+        history['Estimated_Sales'] = np.minimum(history['Demand'], history['Quantity'])
+        history = history.groupby(keys + ['Snapshot_Date'], as_index=False)[['Estimated_Sales', 'FootFall']].sum()
+        history = history.sort_values(keys + ['Snapshot_Date'], ignore_index=True)
+        history['Conversion_Rate'] = history['Estimated_Sales'] / history['FootFall'] * 100
+        return _with_rolling(history, keys, 'Conversion_Rate', window)
+
+    def stock_band_transitions(self, start=None, end=None):
+        """Rows where a store/product moved between Understocked / Balanced / Overstocked
+
+        Returns (transitions, summary) where summary counts moves From_Band -> To_Band.
+        """
+        trend = self.ratio_trend(start, end, window=1)
+        trend['Band'] = stock_band(trend['Supply_Demand_Ratio'])
+        trend['Previous_Band'] = trend.groupby(ITEM_KEYS, sort=False, observed=True)['Band'].shift(1)
+        trend['Previous_Date'] = trend.groupby(ITEM_KEYS, sort=False)['Snapshot_Date'].shift(1)
+        moved = trend[trend['Previous_Band'].notna() & (trend['Band'] != trend['Previous_Band'])]
+        transitions = moved[ITEM_KEYS + ['Previous_Date', 'Snapshot_Date', 'Previous_Band', 'Band']].rename(
+            columns={'Previous_Band': 'From_Band', 'Band': 'To_Band'}).reset_index(drop=True)
+        summary = pd.crosstab(transitions['From_Band'], transitions['To_Band'])
+        return transitions, summary
+
+
+def _with_rolling(history, keys, column, window):
+    """Add Rolling_<column> (mean over `window` snapshots) and <column>_Change vs the previous snapshot"""
+    grouped = history.groupby(keys, sort=False)[column]
+    rolling = grouped.rolling(window, min_periods=1).mean()
+    history[f'Rolling_{column}'] = rolling.reset_index(level=list(range(len(keys))), drop=True)
+    history[f'{column}_Change'] = grouped.diff()
+    return history
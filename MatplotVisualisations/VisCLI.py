@@ -0,0 +1,203 @@
+# Marketplace Command Line - list, compute or render any subset of the registered graphs
+# File: VisCLI.py
+#
+#   python VisCLI.py list
+#   python VisCLI.py metrics --graphs 2a '4*' --output-dir tables/
+#   python VisCLI.py render --data regions/north.csv --graphs '3*' --format svg --jobs 4 --profile
+#   python VisCLI.py render --cache product_store/ --graphs v1,v4
+#   python VisCLI.py insights supply_demand --store 'Craft & Co' --limit 5
+#   python VisCLI.py render --history snapshots/ --graphs '4*'
+#
+# `list`, `metrics` and `insights` never import matplotlib; only `render`
+# loads the plotting stack, and only for the selected graphs.  `insights` keeps
+# the small insight tables next to the dataset (<csv>.insights/ or
+# <cache>/insights/), so repeated polls of an unchanged dataset skip the scan.
+# Every load appends the validated rows to a SnapshotStore (--history, default
+# <csv>.history/ or <cache>/history/) that the trend queries and
+# DemandForecast read; --no-history skips it.
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+
+from MetricsCore import DEFAULT_DATA_PATH, GRAPHS, MarketplaceData, render_graphs, required_aggregates, select_graphs
+from Instrumentation import Profiler
+
+
+def history_directory(args):
+    """SnapshotStore directory for this run: --history, else next to --data / --cache; None with --no-history"""
+    if args.no_history:
+        return None
+    if args.history:
+        return args.history
+    if args.cache:
+        return os.path.join(args.cache, 'history')
+    path = args.data or DEFAULT_DATA_PATH
+    stem = path[:-4] if path.lower().endswith('.csv') else path
+    return f"{stem}.history"
+
+
+def load_data(args, profiler=None):
+    """MarketplaceData from --cache (a ProductSync store) or --data (a CSV, default the bundled one)
+
+    The validated rows are appended to the history store as today's snapshot.
+    """
+    profiler = profiler or Profiler()
+    history = history_directory(args)
+    with profiler.stage('load'):
+        snapshot_store = None
+        if history:
+            from SnapshotStore import SnapshotStore
+            snapshot_store = SnapshotStore(history)
+        if args.cache:
+            from ProductSync import ProductStore
+            data = MarketplaceData.from_frame(ProductStore(args.cache).to_frame(), snapshot_store=snapshot_store,
+                                              check_duplicates=args.check_duplicates)
+        else:
+            data = MarketplaceData.from_csv(args.data or DEFAULT_DATA_PATH, snapshot_store=snapshot_store,
+                                            check_duplicates=args.check_duplicates)
+    data.approximate = args.approximate
+    return data
+
+
+def command_list(args, profiler):
+    for graph_id in select_graphs(args.graphs):
+        spec = GRAPHS[graph_id]
+        print(f"{spec.id:<4} {spec.title:<34} {spec.module}.{spec.method}  needs: {', '.join(spec.needs)}")
+    return 0
+
+
+def command_metrics(args, profiler):
+    data = load_data(args, profiler)
+    data.profiler = profiler
+    tables = data.aggregates(required_aggregates(select_graphs(args.graphs)))
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    for name, table in tables.items():
+        if args.output_dir:
+            table.to_csv(os.path.join(args.output_dir, f"{name}.csv"), index=table.index.name is not None)
+        else:
+            print(f"\n📊 {name} ({len(table)} rows)")
+            print(table.to_string(max_rows=20))
+    if args.output_dir:
+        print(f"✅ Wrote {len(tables)} aggregate tables to {args.output_dir}")
+    return 0
+
+
+def insight_sources(args):
+    """(files the insights depend on, default InsightStore directory) for --data / --cache"""
+    if args.cache:
+        from ProductSync import ProductStore
+        store = ProductStore(args.cache)
+        sources = store.segment_paths() + [os.path.join(args.cache, store.STATE_FILE)]
+        return sources, os.path.join(args.cache, 'insights')
+    path = args.data or DEFAULT_DATA_PATH
+    stem = path[:-4] if path.lower().endswith('.csv') else path
+    return [path], f"{stem}.insights"
+
+
+def command_insights(args, profiler):
+    from Insights import INSIGHTS, polled_data
+
+    kinds = args.kinds or list(INSIGHTS)
+    for kind in kinds:
+        if kind not in INSIGHTS:
+            raise SystemExit(f"Unknown insight '{kind}'; known: {', '.join(INSIGHTS)}")
+    with contextlib.redirect_stdout(sys.stderr):  # Keep stdout pure JSON for polling jobs
+        if args.no_insights_cache:
+            data = load_data(args, profiler)
+        else:
+            sources, directory = insight_sources(args)
+            with profiler.stage('insight tables'):
+                data = polled_data([path for path in sources if os.path.exists(path)],
+                                   lambda: load_data(args, profiler), args.insights_cache or directory,
+                                   {'check_duplicates': args.check_duplicates}, kinds)
+    data.profiler = profiler
+    given = {name: getattr(args, name) for name in ('store', 'location', 'category', 'product', 'limit')
+             if getattr(args, name) is not None}
+    result = {}
+    for kind in kinds:
+        result[kind] = data.insights(kind, **{name: value for name, value in given.items()
+                                              if name in INSIGHTS[kind].filters})
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    return 0
+
+
+def command_render(args, profiler):
+    ids = select_graphs(args.graphs)
+    data = load_data(args, profiler)
+    data.profiler = profiler
+    figures = {'pool_size': args.pool_size, 'max_rss_mb': args.max_rss_mb}
+    results = render_graphs(data, ids, args.output_dir, args.jobs, args.format, args.dpi, profiler, figures)
+    saved = [result for result in results if result['status'] == 'ok']
+    for result in results:
+        if result['status'] != 'ok':
+            print(f"⏭️ {result['graph']} skipped (nothing to plot)")
+    print(f"✅ Rendered {len(saved)} of {len(ids)} graphs to {args.output_dir}")
+    return 0
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    source = common.add_mutually_exclusive_group()
+    source.add_argument('--data', help="CSV dataset (default: the bundled product_data(in).csv)")
+    source.add_argument('--cache', help="ProductStore directory kept up to date by ProductSync")
+    history = common.add_mutually_exclusive_group()
+    history.add_argument('--history', help="SnapshotStore directory each load appends to "
+                                           "(default: <csv>.history/ or <cache>/history/)")
+    history.add_argument('--no-history', action='store_true', help="Do not record this run's snapshot")
+    common.add_argument('--graphs', nargs='+', help="Graph ids or globs, e.g. 2a '4*' v1,v4 (default: all)")
+    common.add_argument('--approximate', action='store_true', help="Sketch-based distinct counts and medians")
+    common.add_argument('--check-duplicates', action=argparse.BooleanOptionalAction, default=True,
+                        help="Quarantine rows repeating a store/location/product key (skip if keys are unique)")
+    common.add_argument('--profile', action=argparse.BooleanOptionalAction, default=False,
+                        help="Print per-stage timings and peak RSS")
+    common.add_argument('--profile-output', help="Also write the timings to this JSON file")
+
+    parser = argparse.ArgumentParser(description="Marketplace metrics and graphs")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', parents=[common], help="Show the graph registry")
+    metrics = commands.add_parser('metrics', parents=[common], help="Compute aggregate tables only")
+    metrics.add_argument('--output-dir', help="Write one CSV per aggregate instead of printing")
+    insights = commands.add_parser('insights', parents=[common], help="Print insights as JSON")
+    insights.add_argument('kinds', nargs='*', help="Insight kinds (default: all)")
+    insights.add_argument('--store')
+    insights.add_argument('--location')
+    insights.add_argument('--category')
+    insights.add_argument('--product')
+    insights.add_argument('--limit', type=int)
+    insights.add_argument('--insights-cache', help="Directory of persisted insight tables (default: next to the data)")
+    insights.add_argument('--no-insights-cache', action='store_true', help="Always rescan the dataset")
+    render = commands.add_parser('render', parents=[common], help="Render graphs to files")
+    render.add_argument('--output-dir', default='graph_output')
+    render.add_argument('--format', default='png', choices=['png', 'svg', 'pdf', 'jpg'])
+    render.add_argument('--dpi', type=int, default=300)
+    render.add_argument('--jobs', type=int, default=1, help="Parallel plotting processes")
+    render.add_argument('--pool-size', type=int, default=0, help="Recycled figures kept per size (0 = close all)")
+    render.add_argument('--max-rss-mb', type=float, help="Flush pooled figures above this resident memory")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        select_graphs(args.graphs)
+    except ValueError as error:
+        parser.error(str(error))
+
+    profiler = Profiler(track_memory=args.profile)
+    command = {'list': command_list, 'metrics': command_metrics, 'insights': command_insights,
+               'render': command_render}[args.command]
+    status = command(args, profiler)
+    if args.profile:
+        profiler.report()
+    if args.profile_output:
+        profiler.to_json(args.profile_output)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# Shared Visualizer Base - loading, figure output and graph dispatch for every graph module
+# File: VisualizerBase.py
+#
+# DaaVis2.MarketplaceVisualizer and DataVis.MarketplaceVisualizer only hold the
+# plotting code; data, derived columns and aggregate tables live in a
+# MetricsCore.MarketplaceData shared by every graph.
+
+import matplotlib.pyplot as plt
+
+from FigureManager import FIGURES, release_figure
+from MetricsCore import DEFAULT_DATA_PATH, GRAPHS, MarketplaceData
+
+
+class BaseVisualizer:
+    def __init__(self, csv_file_path=DEFAULT_DATA_PATH, snapshot_store=None, quarantine_path=None,
+                 check_duplicates=True):
+        """Initialize with CSV data; with a SnapshotStore, the run is also recorded in the history
+
+        Invalid rows are written to `quarantine_path` (default: <csv>.quarantine.csv).
+        Pass check_duplicates=False when the source guarantees unique keys.
+        """
+        self._attach(MarketplaceData.from_csv(csv_file_path, quarantine_path, snapshot_store, check_duplicates))
+
+    @classmethod
+    def from_dataframe(cls, df, snapshot_store=None, quarantine_path=None, check_duplicates=True):
+        """Initialize from an already loaded frame (e.g. a ProductStore sync)"""
+        return cls.from_data(MarketplaceData.from_frame(df.copy(), quarantine_path, snapshot_store,
+                                                        check_duplicates))
+
+    @classmethod
+    def from_data(cls, data):
+        """Initialize over an existing MarketplaceData, sharing its memoized aggregates"""
+        viz = cls.__new__(cls)
+        viz._attach(data)
+        return viz
+
+    def _attach(self, data):
+        self.data = data
+        self.defer_output = False  # When True, graphs hand back their figure instead of saving/showing
+        self._last_figure = None
+        self.plot_values = {}  # What the last render_graph decided while plotting (see _record_values)
+
+    # The frame and aggregate options live on the shared data
+    @property
+    def df(self):
+        return self.data.df
+
+    @df.setter
+    def df(self, df):
+        self.data.df = df
+
+    @property
+    def validation_report(self):
+        return self.data.validation_report
+
+    @property
+    def approximate(self):
+        """When True, distinct counts and medians come from mergeable sketches"""
+        return self.data.approximate
+
+    @approximate.setter
+    def approximate(self, value):
+        self.data.approximate = value
+
+    @property
+    def sales_column(self):
+        """Conversion graphs plot this (e.g. 'Projected_Sales' after a forecast)"""
+        return self.data.sales_column
+
+    @sales_column.setter
+    def sales_column(self, value):
+        self.data.sales_column = value
+
+    def _finish_figure(self, save_path=None):
+        """Save, show and release the current figure, or hand it over when output is deferred
+
+        A deferred figure belongs to the caller, who passes it to
+        FigureManager.release_figure once exported.  With figure pooling the
+        returned figure is recycled by a later graph after release.
+        """
+        fig = self._last_figure = plt.gcf()
+        if self.defer_output:
+            if not FIGURES.pooling:
+                plt.close(fig)  # Figure stays usable via fig.savefig, but pyplot no longer tracks it
+            return fig
+        if save_path:
+            fig.savefig(save_path, dpi=300, bbox_inches='tight')
+        plt.show()
+        release_figure(fig)
+        return fig
+
+    def _record_values(self, **values):
+        """Note values a graph derives while plotting (thresholds, splits) for render_graph callers"""
+        self.plot_values.update(values)
+
+    def graph_table(self, graph_id):
+        """The aggregate table that feeds graph `graph_id`"""
+        return self.data.aggregate(GRAPHS[graph_id].table)
+
+    def insights(self, kind, **filters):
+        """Cached, JSON-ready insight `kind` for this data (see Insights.INSIGHTS); draws nothing"""
+        return self.data.insights(kind, **filters)
+
+    def render_graph(self, graph_id):
+        """Build graph `graph_id` (e.g. '2c') without saving; returns the figure or None if skipped
+
+        Afterwards `plot_values` holds what the method recorded while plotting
+        (e.g. 4C's median split) and, under 'insights', the insights dict the
+        DataVis visualization_* methods return.
+        """
+        previous, self.defer_output, self._last_figure = self.defer_output, True, None
+        self.plot_values = {}
+        try:
+            returned = getattr(self, GRAPHS[graph_id].method)()
+            if isinstance(returned, dict):
+                self.plot_values['insights'] = returned
+            return self._last_figure
+        finally:
+            self.defer_output = previous
@@ -0,0 +1,26 @@
+import shutil
+import sys
+
+import VisCLI
+from MetricsCore import DEFAULT_DATA_PATH
+from SnapshotStore import SnapshotStore
+
+
+def test_each_load_appends_a_snapshot_next_to_the_data(tmp_path, monkeypatch, capsys):
+    for engine in ('pyarrow', 'fastparquet'):
+        monkeypatch.setitem(sys.modules, engine, None)  # Pickled parts: no Parquet engine needed
+    csv_path = str(tmp_path / 'products.csv')
+    shutil.copyfile(DEFAULT_DATA_PATH, csv_path)
+
+    for _ in range(2):
+        assert VisCLI.main(['metrics', '--data', csv_path, '--graphs', '1a']) == 0
+    history = SnapshotStore(str(tmp_path / 'products.history'))
+    assert len(history.read(latest_per_day=False)) == 2 * len(history.read())
+    assert not history.read().empty
+
+
+def test_no_history_skips_the_snapshot(tmp_path, capsys):
+    csv_path = str(tmp_path / 'products.csv')
+    shutil.copyfile(DEFAULT_DATA_PATH, csv_path)
+    assert VisCLI.main(['metrics', '--data', csv_path, '--graphs', '1a', '--no-history']) == 0
+    assert not (tmp_path / 'products.history').exists()
@@ -0,0 +1,42 @@
+import json
+import os
+import shutil
+import sys
+
+import pytest
+
+import VisCLI
+from MetricsCore import DEFAULT_DATA_PATH
+
+
+@pytest.fixture
+def no_parquet_engine(monkeypatch):
+    for engine in ('pyarrow', 'fastparquet'):
+        monkeypatch.setitem(sys.modules, engine, None)  # Importing it now raises ImportError
+
+
+def run_insights(capsys, *argv):
+    assert VisCLI.main(['insights', *argv]) == 0
+    return json.loads(capsys.readouterr().out)
+
+
+def test_insights_poll_without_parquet_engine(tmp_path, capsys, monkeypatch, no_parquet_engine):
+    csv_path = str(tmp_path / 'products.csv')
+    shutil.copyfile(DEFAULT_DATA_PATH, csv_path)
+
+    first = run_insights(capsys, 'supply_demand', 'store_performance', '--data', csv_path)
+    assert os.path.exists(tmp_path / 'products.insights' / 'key.json')
+
+    def rescan(*args, **kwargs):
+        raise AssertionError("an unchanged dataset must be served from the insight store")
+    monkeypatch.setattr(VisCLI, 'load_data', rescan)
+    assert run_insights(capsys, 'supply_demand', 'store_performance', '--data', csv_path) == first
+
+
+def test_insights_store_matches_direct_load(tmp_path, capsys, no_parquet_engine):
+    csv_path = str(tmp_path / 'products.csv')
+    shutil.copyfile(DEFAULT_DATA_PATH, csv_path)
+
+    direct = run_insights(capsys, '--data', csv_path, '--no-insights-cache')
+    run_insights(capsys, '--data', csv_path)  # Builds the store
+    assert run_insights(capsys, '--data', csv_path) == direct